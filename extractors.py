@@ -3,14 +3,26 @@
 # --- LAST ACTIVE (RU) PARSER --------------------------------------------------
 from __future__ import annotations
 
+import functools
+import json
 import os, re
-from playwright.sync_api import Page, Locator, TimeoutError as PlaywrightTimeoutError
+import queue, threading, time
+from collections import deque
+from dataclasses import dataclass, field
+from playwright.sync_api import (
+    Browser, BrowserContext, Page, Locator, Route,
+    TimeoutError as PlaywrightTimeoutError, sync_playwright,
+)
 from datetime import date, datetime, timezone, timedelta
-from typing import Optional, Tuple, List
-import time
+from typing import Any, Callable, Optional, List, Union
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 
-PROFILE_URL_RE = re.compile(r".*/nyanya/[^/]+/\d+/?$")
+# Selectors/patterns built on the fly elsewhere in the app share re's pattern
+# cache; keep it large enough that a long crawl never evicts our hot ones.
+re._MAXCACHE = max(re._MAXCACHE, 4096)
+
+# Anchored at the end only: no leading ".*" to backtrack over on every URL event
+PROFILE_URL_RE = re.compile(r"/nyanya/[^/]+/\d+/?$", re.ASCII)
 NBSP = u"\u00A0"
 
 # Russian months (genitive case as shown on the site)
@@ -34,16 +46,169 @@ _RE_REL = re.compile(
 
 _RE_TIME = re.compile(r"(?P<h>\d{1,2}):(?P<m>\d{2})")
 
+# Absolute dates: "DD <месяц> [YYYY] [в HH:MM]"
+_ABS_RE = re.compile(
+    r"(?P<d>\d{1,2})\s+(?P<mon>[а-я]+)(?:\s+(?P<y>\d{4}))?(?:\s+в\s+(?P<h>\d{1,2}):(?P<m>\d{2}))?",
+    re.IGNORECASE
+)
+
+# All 'last active' forms in one pass; branch on whichever group fired.
+# Alternation order matters: at the same offset "15 минут назад" must hit the
+# relative branch before the absolute one.
+_LA_RE = re.compile(
+    r"(?P<kw>сейчас|сегодня|вчера)|" + _RE_REL.pattern + "|" + _ABS_RE.pattern,
+    re.IGNORECASE
+)
+
+# "Был(а) на сайте" label + value, stopping at bullet/newline. Second branch:
+# label without colon or with odd spacing ("Была на сайтесейчас").
+_LA_LABEL_RE = re.compile(
+    r"Был[а]?\s+на\s+сайте"
+    r"(?:[:\s]+(?P<val>[^•\n\r]+)"
+    r"|\s*(?P<val2>сейчас|сегодня|вчера|[\d\s]+(?:минут|час|дн)[^•\n\r]*))",
+    re.IGNORECASE
+)
+
+# Lowercase (ASCII + Cyrillic) and fold ё -> е in a single translate pass
+_LOWER_RU_TRANS = str.maketrans({
+    **{c: c.lower() for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZАБВГДЕЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ"},
+    "Ё": "е",
+    "ё": "е",
+})
+
+# Home address normalization (see _normalize_home_address)
+_NORM_G_RE   = re.compile(r"^\s*г\.?\s*", re.I)     # leading "г"/"г."
+_NORM_D_RE   = re.compile(r"\bд\.?\s*", re.I)       # "д "
+_NORM_K_RE   = re.compile(r"\s+к\.?\s*", re.I)      # "к 2" -> "к2"
+_NORM_WS_RE  = re.compile(r"\s+")
+_NORM_MSK_RE = re.compile(r"\bМосква\b", re.I)
+
+# Yandex/Google maps links: nanny coordinates
+_YM_Q_RE     = re.compile(r"maps/\?q=([-\d.]+),([-\d.]+)")         # Google ?q=lat,lon
+_YM_RTEXT_RE = re.compile(r"rtext=[^~]+~([-\d.]+),([-\d.]+)")     # Yandex rtext=…~lat,lon
+
 # --- SERP card → absolute URL -------------------------------------------------
 BASE = "https://nashanyanya.ru"
 
 CARD_SELECTOR = "nn-nanny-resume-card:visible, div.nn-nanny-resume-card:visible"
+# Same cards for document.querySelectorAll (no Playwright-only :visible)
+_CARD_CSS = "nn-nanny-resume-card, div.nn-nanny-resume-card"
+
+# One CDP round-trip for the whole SERP: visible cards -> {href, text}
+_SERP_ROWS_JS = """
+(sel) => Array.from(document.querySelectorAll(sel))
+  .filter(c => c.getClientRects().length > 0 && getComputedStyle(c).visibility !== 'hidden')
+  .map(c => ({
+    href: c.querySelector("a[href^='/nyanya/']")?.getAttribute('href') || "",
+    text: c.innerText || "",
+  }))
+"""
 
 _ID_RE = re.compile(r"/nyanya/[^/]+/(?P<id>\d+)(?:/|$)")
 
+# --- Profile page: embedded JSON fields ---------------------------------------
+_NAME_RE       = re.compile(r'"name"\s*:\s*"([^"]+)"')
+_BIRTHDATE_RE  = re.compile(r'"birthDate"\s*:\s*"([^"]+)"')
+_EXPERIENCE_RE = re.compile(r'"experienceAge"\s*:\s*(\d+)')
+_REC_LABEL_RE  = re.compile(r"^\s*РЕКОМЕНДАЦИЯ\s*", re.IGNORECASE)
+_DIGITS_RE     = re.compile(r"\d+")
+_JSONLD_RE     = re.compile(r"""<script[^>]+type=["']application/ld\+json["'][^>]*>(.*?)</script>""", re.DOTALL)
+_YEARS_RE      = re.compile(r"(\d{1,3})\s*лет")
+
+# _clean_para: NBSP -> space, drop CR; then one sub trims every line and drops blank ones
+_PARA_TRANS    = str.maketrans({NBSP: " ", "\r": None})
+_WS_RUN_RE     = re.compile(r"[^\S\n]*\n\s*")
+
+# Yandex route durations (see parse_ru_duration_to_min)
+_DUR_HM_RE  = re.compile(r"(\d+)\s*ч(?:\D+?(\d+)\s*мин)?")
+_DUR_MIN_RE = re.compile(r"(\d+)\s*мин")
+_DUR_H_RE   = re.compile(r"(\d+)\s*ч\b")
+
+# --- Profile page: selectors (Playwright fallbacks behind the DOM blob) ------
+_NAME_SEL      = "h1.profile-header__title"
+_ABOUT_SEL     = "div.about__content div.about__texts"
+_ADDRESS_SEL   = ".about__address .show-address__content a.show-address__link"
+_EDU_SELS      = (
+    "nn-worker-educations .block__footer",
+    "div.block:has(h2.block__title:has-text('Образование')) .block__footer",
+)
+_RECS_LIST_SEL = "nn-resume-recommendation-list"
+_RECS_ITEM_SEL = ".recomm__content"
+_RECS_ITEM_OLD_SEL = ".recomm__item, li, nn-resume-recommendation-item"
+
+# Present on the page if the profile has an audio message (see extract_has_audio_from_profile)
+_AUDIO_SEL = (
+    "div.block.block_audio, nn-audio-message, nn-audio-player, "
+    "audio[src*='audio.nashanyanya.ru'], audio[src$='.mp3']"
+)
+# A mounted player inside the 'Записанные сказки' block (see extract_has_fairy_tale_audio)
+_TALE_PLAYER_SEL = (
+    "nn-voice-acting-tales audio, nn-voice-acting-tales nn-audio-player, "
+    "div.block:has(.block__title:has-text('Записанные сказки')) audio, "
+    "div.block:has(.block__title:has-text('Записанные сказки')) nn-audio-player"
+)
+
+# Visible 'Лет опыта' stat value, or null (CSS scan; no XPath engine)
+_EXP_STAT_JS = """
+() => {
+  for (const item of document.querySelectorAll('.catalog-stats__item')) {
+    if (item.querySelector('.catalog-stats__type')?.innerText.trim() === 'Лет опыта')
+      return item.querySelector('.catalog-stats__value')?.innerText || null;
+  }
+  return null;
+}
+"""
+
+# --- Profile page: phone popup ------------------------------------------------
+_PHONE_BTN_SEL = (
+    "aside .card__phone button, "
+    "nn-show-resume-phone-button.card__phone button, "
+    "nn-show-resume-phone-button button, "
+    ".card__phone button, "
+    "button:has-text('Телефон')"
+)
+_DIALOG_CLOSE_SEL = "[data-test-id='dialog-close-button'], button[data-test-id='dialog-close-button']"
+
+# Hides Angular CDK overlays that intercept clicks (see _dismiss_blocking_overlays)
+_DISMISS_FN = """
+() => {
+  const root = document.querySelector('.cdk-overlay-container');
+  if (!root) return 0;
+  let n = 0;
+
+  // Any coachmark / interview / tour / tooltip panes
+  for (const pane of root.querySelectorAll('.cdk-overlay-pane')) {
+    // Skip the phone bottom-sheet
+    if (pane.querySelector('mat-bottom-sheet-container')) continue;
+
+    // Known blockers
+    if (
+      pane.querySelector('.interview') ||
+      pane.querySelector('[data-tour], [data-coachmark], [role="dialog"]') ||
+      pane.querySelector('.mat-tooltip') ||
+      pane.querySelector('.cookie, .cookies')
+    ) {
+      pane.style.display = 'none';
+      pane.style.pointerEvents = 'none';
+      n++;
+    }
+  }
+  // Backdrops can also steal pointer events
+  for (const bd of root.querySelectorAll('.cdk-overlay-backdrop')) {
+    bd.style.pointerEvents = 'none';
+    n++;
+  }
+  return n;
+}
+"""
+# Installed once per context (install_overlay_dismisser); calls are then a tiny evaluate
+_DISMISS_JS_INIT = f"window.__dismissOverlays = {_DISMISS_FN.strip()};"
+_DISMISS_CALL_JS = "() => window.__dismissOverlays ? window.__dismissOverlays() : null"
+_DISMISS_JS = f"({_DISMISS_FN.strip()})()"
 
-from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
-import re, os
+def install_overlay_dismisser(context: BrowserContext) -> None:
+    """Register window.__dismissOverlays on every page of `context` (call right after new_context)."""
+    context.add_init_script(_DISMISS_JS_INIT)
 
 def _dismiss_blocking_overlays(page, dbg: bool = False) -> None:
     """
@@ -51,37 +216,9 @@ def _dismiss_blocking_overlays(page, dbg: bool = False) -> None:
     Keeps bottom-sheets intact.
     """
     try:
-        removed = page.evaluate("""
-        (() => {
-          const root = document.querySelector('.cdk-overlay-container');
-          if (!root) return 0;
-          let n = 0;
-
-          // Any coachmark / interview / tour / tooltip panes
-          for (const pane of root.querySelectorAll('.cdk-overlay-pane')) {
-            // Skip the phone bottom-sheet
-            if (pane.querySelector('mat-bottom-sheet-container')) continue;
-
-            // Known blockers
-            if (
-              pane.querySelector('.interview') ||
-              pane.querySelector('[data-tour], [data-coachmark], [role="dialog"]') ||
-              pane.querySelector('.mat-tooltip') ||
-              pane.querySelector('.cookie, .cookies')
-            ) {
-              pane.style.display = 'none';
-              pane.style.pointerEvents = 'none';
-              n++;
-            }
-          }
-          // Backdrops can also steal pointer events
-          for (const bd of root.querySelectorAll('.cdk-overlay-backdrop')) {
-            bd.style.pointerEvents = 'none';
-            n++;
-          }
-          return n;
-        })();
-        """)
+        removed = page.evaluate(_DISMISS_CALL_JS)
+        if removed is None:  # context without the init script
+            removed = page.evaluate(_DISMISS_JS)
         if dbg: print(f"[PHONE] overlays hidden: {removed}", flush=True)
     except Exception as e:
         if dbg: print(f"[PHONE] overlay hide error: {e}", flush=True)
@@ -91,13 +228,7 @@ def extract_phone_number(page, timeout: int = 8000) -> Optional[str]:
 
     # 1) Click the 'Телефон' button (fast + robust)
     try:
-        btn = page.locator(
-            "aside .card__phone button, "
-            "nn-show-resume-phone-button.card__phone button, "
-            "nn-show-resume-phone-button button, "
-            ".card__phone button, "
-            "button:has-text('Телефон')"
-        ).first
+        btn = page.locator(_PHONE_BTN_SEL).first
 
         # Make sure it really exists in the DOM and is visible (handlers attached)
         btn.wait_for(state="visible", timeout=timeout)
@@ -180,7 +311,7 @@ def extract_phone_number(page, timeout: int = 8000) -> Optional[str]:
     finally:
         # Try to close the popup (best-effort)
         try:
-            page.locator("[data-test-id='dialog-close-button'], button[data-test-id='dialog-close-button']").first.click(timeout=1500)
+            page.locator(_DIALOG_CLOSE_SEL).first.click(timeout=1500)
         except Exception:
             try:
                 page.keyboard.press("Escape")
@@ -191,7 +322,7 @@ def extract_phone_number(page, timeout: int = 8000) -> Optional[str]:
     raw = href if href else text
     if raw.startswith("tel:"):
         raw = raw[4:]
-    digits = re.sub(r"\D", "", raw)
+    digits = "".join(filter(str.isdecimal, raw))  # same set as \d, no regex engine
 
     if not digits:
         return None
@@ -206,18 +337,6 @@ def extract_phone_number(page, timeout: int = 8000) -> Optional[str]:
     if dbg: print(f"[PHONE] normalized -> {e164}", flush=True)
     return e164
 
-def card_primary_url(card) -> str:
-    """
-    Return the absolute profile URL for a SERP card, or "" if not found.
-    Works for any city: /nyanya/<city>/<id>.
-    """
-    a = card.locator("a[href^='/nyanya/']").first
-    if a.count() == 0:
-        return ""
-    href = a.get_attribute("href") or ""
-    return href if href.startswith("http") else f"{BASE}{href}"
-
-
 # Examples the site shows (varies):
 # "Была на сайте: Сейчас"
 # "Был на сайте: Сегодня"
@@ -241,123 +360,105 @@ def parse_last_active_ru(raw: str, *, now: Optional[datetime] = None) -> Optiona
     if not raw:
         return None
 
-    text = raw.strip().lower().replace("ё", "е")
+    text = raw.strip().translate(_LOWER_RU_TRANS)
+
+    # Cheap reject before any regex work: every form we parse carries a
+    # keyword, "назад" (relative) or a digit (absolute)
+    if not ("назад" in text or any(ch.isdigit() for ch in text)
+            or "сейчас" in text or "сегодня" in text or "вчера" in text):
+        return None
+
     now = now or datetime.now().astimezone()
 
+    m = _LA_RE.search(text)
+    if not m:
+        return None
+
+    kw = m.group("kw")
+
     # 1) Сейчас
-    if "сейчас" in text:
+    if kw == "сейчас":
         return now
 
     # 2) Сегодня [в HH:MM]
-    if "сегодня" in text:
+    if kw == "сегодня":
         mt = _RE_TIME.search(text)
         if mt:
-            h, m = int(mt.group("h")), int(mt.group("m"))
-            return now.replace(hour=h, minute=m, second=0, microsecond=0)
+            h, mm = int(mt.group("h")), int(mt.group("m"))
+            return now.replace(hour=h, minute=mm, second=0, microsecond=0)
         # No time given: still within 24h, return 'now'
         return now
 
     # 3) Вчера [в HH:MM]
-    if "вчера" in text:
+    if kw == "вчера":
         mt = _RE_TIME.search(text)
         base = (now - timedelta(days=1))
         if mt:
-            h, m = int(mt.group("h")), int(mt.group("m"))
-            return base.replace(hour=h, minute=m, second=0, microsecond=0)
+            h, mm = int(mt.group("h")), int(mt.group("m"))
+            return base.replace(hour=h, minute=mm, second=0, microsecond=0)
         # Noon yesterday as a reasonable center
         return base.replace(hour=12, minute=0, second=0, microsecond=0)
 
     # 4) Relative: "<N> ... назад"
-    mrel = _RE_REL.search(text)
-    if mrel:
-        num_str = mrel.group("num")
+    unit = m.group("unit")
+    if unit:
+        num_str = m.group("num")
         num = int(num_str) if num_str else 1  # default to 1 when number omitted
-        unit = mrel.group("unit")
-        unit = unit.lower()
 
         if unit.startswith("минут"):
             return now - timedelta(minutes=num)
         if unit.startswith("час"):
             return now - timedelta(hours=num)
-        if unit.startswith("сут") or unit.startswith("д"):
-            return now - timedelta(days=num)
+        return now - timedelta(days=num)   # сутки / день / дня / дней
 
     # 5) Absolute: "DD <месяц> [YYYY] [в HH:MM]"
     #    e.g., "14 февраля 2025 в 09:30", "3 марта в 8:00", "7 июня"
     #    Year is optional; assume current year if missing.
-    abs_re = re.compile(
-        r"(?P<d>\d{1,2})\s+(?P<mon>[а-я]+)(?:\s+(?P<y>\d{4}))?(?:\s+в\s+(?P<h>\d{1,2}):(?P<m>\d{2}))?",
-        re.IGNORECASE
-    )
-    ma = abs_re.search(text)
-    if ma:
-        d = int(ma.group("d"))
-        mon_str = ma.group("mon")
-        mon = _RU_MONTHS.get(mon_str, None)
-        if mon is None:
-            return None
-        y = int(ma.group("y")) if ma.group("y") else now.year
-        h = int(ma.group("h")) if ma.group("h") else 12
-        m = int(ma.group("m")) if ma.group("m") else 0
-        try:
-            dt = datetime(y, mon, d, h, m)
-            # attach local tz
-            return now.tzinfo.localize(dt) if hasattr(now.tzinfo, "localize") else dt.replace(tzinfo=now.tzinfo)
-        except ValueError:
-            return None
-
-    return None
+    d = int(m.group("d"))
+    mon = _RU_MONTHS.get(m.group("mon"), None)
+    if mon is None:
+        return None
+    y = int(m.group("y")) if m.group("y") else now.year
+    h = int(m.group("h")) if m.group("h") else 12
+    mm = int(m.group("m")) if m.group("m") else 0
+    try:
+        dt = datetime(y, mon, d, h, mm)
+        # attach local tz
+        return now.tzinfo.localize(dt) if hasattr(now.tzinfo, "localize") else dt.replace(tzinfo=now.tzinfo)
+    except ValueError:
+        return None
 
 def _slice_last_active(raw: Optional[str]) -> Optional[str]:
     """Return only 'Был(а) на сайте: ...' from a longer blob."""
     if not raw:
         return None
     t = raw.replace("\xa0", " ").strip()
+    if "сайте" not in t.lower():   # the label is required; skip the regex pass
+        return None
 
-    # Grab the value right after the label, stop at bullet/newline
-    m = re.search(r"Был[а]?\s+на\s+сайте[:\s]+(?P<val>[^•\n\r]+)", t, flags=re.IGNORECASE)
-    if m:
-        val = re.sub(r"\s+", " ", m.group("val")).strip(" .,:;")
-        return f"Был(а) на сайте: {val}"
-
-    # Fallback: if label is present without colon or odd spacing
-    m = re.search(
-        r"(Был[а]?\s+на\s+сайте)\s*(?P<val>сейчас|сегодня|вчера|[\d\s]+(?:минут|час|дн)[^•\n\r]*)",
-        t, flags=re.IGNORECASE
-    )
-    if m:
-        val = re.sub(r"\s+", " ", m.group("val")).strip(" .,:;")
-        return f"Был(а) на сайте: {val}"
-
-    return None
+    m = _LA_LABEL_RE.search(t)
+    if not m:
+        return None
+    val = m.group("val") or m.group("val2")
+    return f"Был(а) на сайте: {' '.join(val.split()).strip(' .,:;')}"
 
 
-def extract_last_active_from_card(card, timeout: int = 1200) -> Tuple[Optional[str], Optional[datetime]]:
+def extract_serp_rows(page: Page) -> List[dict]:
     """
-    Read 'Был(а) на сайте: ...' from a SERP card and return (raw_text, parsed_dt).
-    Never throws on absence; returns (None, None) if not found.
+    Read every visible SERP card in a single page.evaluate and return
+    [{url, last_active_raw, last_active_at}] in DOM order.
+    One CDP round-trip for the whole page instead of 2–3 per card.
     """
-    raw: Optional[str] = None
-
-    # 1) Preferred: an element that contains the label
-    try:
-        badge = card.locator("text=/Был[а]?\\s+на\\s+сайте/i").first
-        badge.wait_for(state="attached", timeout=timeout)
-        blob = (badge.inner_text() or "").replace("\xa0", " ").strip()
-        raw = _slice_last_active(blob)
-    except Exception:
-        pass
-
-    # 2) Fallback: whole-card text → slice just the label part
-    if not raw:
-        try:
-            blob = (card.inner_text(timeout=timeout) or "").replace("\xa0", " ").strip()
-            raw = _slice_last_active(blob)
-        except Exception:
-            pass
-
-    parsed = parse_last_active_ru(raw) if raw else None
-    return raw, parsed
+    out: List[dict] = []
+    for c in page.evaluate(_SERP_ROWS_JS, _CARD_CSS) or []:
+        href = c.get("href") or ""
+        raw = _slice_last_active((c.get("text") or "").replace("\xa0", " ").strip())
+        out.append({
+            "url": href if not href or href.startswith("http") else f"{BASE}{href}",
+            "last_active_raw": raw,
+            "last_active_at": parse_last_active_ru(raw) if raw else None,
+        })
+    return out
 
 def get_serp_cards(page: Page, timeout: int = 15000) -> Locator:
     """
@@ -367,22 +468,26 @@ def get_serp_cards(page: Page, timeout: int = 15000) -> Locator:
     cards.first.wait_for(state="visible", timeout=timeout)
     return cards
 
+# Top 3 + bottom 3 profile IDs, computed in the page (same rule as _ID_RE)
+_SERP_FP_JS = r"""
+() => {
+  const ids = [];
+  for (const a of document.querySelectorAll(
+      "nn-nanny-resume-card a[href^='/nyanya/'], div.nn-nanny-resume-card a[href^='/nyanya/']")) {
+    const m = /\/nyanya\/[^/]+\/(\d+)(?:\/|$)/.exec(a.getAttribute('href') || '');
+    if (m) ids.push(m[1]);
+  }
+  if (!ids.length) return "";
+  const tail = ids.length > 3 ? ids.slice(-3) : ids;
+  return ids.slice(0, 3).concat(tail).join('|');
+}
+"""
+# Predicate for wait_for_function: SERP fingerprint differs from `before`
+_SERP_CHANGED_JS = "(before) => { const fp = (" + _SERP_FP_JS + ")(); return !!fp && fp !== before; }"
+
 def _serp_fingerprint(page: Page) -> str:
     """Top 3 + bottom 3 profile IDs to detect SERP changes."""
-    hrefs = page.locator(
-        "nn-nanny-resume-card a[href^='/nyanya/'], "
-        "div.nn-nanny-resume-card a[href^='/nyanya/']"
-    ).evaluate_all("els => els.map(e => e.getAttribute('href'))")
-    ids = []
-    for h in hrefs or []:
-        m = _ID_RE.search(h or "")
-        if m:
-            ids.append(m.group("id"))
-    if not ids:
-        return ""
-    head = ids[:3]
-    tail = ids[-3:] if len(ids) > 3 else ids
-    return "|".join(head + tail)
+    return page.evaluate(_SERP_FP_JS) or ""
 
 def go_to_next_serp_page(page: Page, timeout_ms: int = 12000) -> bool:
     """
@@ -400,7 +505,6 @@ def go_to_next_serp_page(page: Page, timeout_ms: int = 12000) -> bool:
     # Hard scroll to bottom, then center the paginator in the viewport.
     page.evaluate("() => window.scrollTo(0, document.body.scrollHeight)")
     paginator.scroll_into_view_if_needed()
-    page.wait_for_timeout(150)
 
     # Select the Next nav button inside the paginator (bottom one).
     next_btn = paginator.locator(":is(button,a).pagination__nav_next").last
@@ -441,20 +545,47 @@ def go_to_next_serp_page(page: Page, timeout_ms: int = 12000) -> bool:
                     print(f"[DEBUG] Next click failed. e1={e1} e2={e2} e3={e3} e4={e4}", flush=True)
                     return False
 
-    # Wait for SERP to actually change.
-    deadline = time.time() + (timeout_ms / 1000.0)
-    last_fp = ""
-    while time.time() < deadline:
-        cur_fp = _serp_fingerprint(page)
-        if cur_fp and cur_fp != before_fp:
-            return True
-        if cur_fp != last_fp:
-            last_fp = cur_fp  # progress hint for yourself if you want to print
-        page.wait_for_timeout(200)
+    # Wait for SERP to actually change (predicate runs in the page, no Python polling).
+    try:
+        page.wait_for_function(_SERP_CHANGED_JS, arg=before_fp, timeout=timeout_ms)
+        return True
+    except PlaywrightTimeoutError:
+        pass
 
+    try:
+        last_fp = _serp_fingerprint(page)
+    except Exception:
+        last_fp = "?"
     print(f"[DEBUG] Pagination click did not change fingerprint (before={before_fp} after={last_fp}).", flush=True)
     return False
 
+def _is_profile_url(url: str) -> bool:
+    return PROFILE_URL_RE.search(url) is not None
+
+# Recent successful contact-control waits (ms); the budget shrinks toward their p95
+_CONTACT_WAIT_MS: "deque[float]" = deque(maxlen=50)
+
+def _contact_controls(page: Page) -> Locator:
+    """'НАПИСАТЬ' button or a tel: link, whichever renders first."""
+    return page.locator("text=НАПИСАТЬ").or_(page.locator("a[href^='tel:']")).first
+
+def _contact_budget(cap_ms: int) -> int:
+    samples = sorted(_CONTACT_WAIT_MS)
+    if len(samples) < 10:
+        return cap_ms
+    p95 = samples[int(0.95 * (len(samples) - 1))]
+    return int(min(cap_ms, max(500, 2 * p95)))
+
+def wait_for_contact_controls(page: Page, cap_ms: int = 3000) -> bool:
+    """Wait (adaptive budget, at most cap_ms) for profile contact controls; True if visible."""
+    t0 = time.perf_counter()
+    try:
+        _contact_controls(page).wait_for(state="visible", timeout=_contact_budget(cap_ms))
+    except PlaywrightTimeoutError:
+        return False
+    _CONTACT_WAIT_MS.append((time.perf_counter() - t0) * 1000)
+    return True
+
 def open_profile_from_card(page: Page, card: Locator, timeout: int = 15000) -> None:
     """
     Reuses your proven logic:
@@ -477,40 +608,355 @@ def open_profile_from_card(page: Page, card: Locator, timeout: int = 15000) -> N
         more_btn.scroll_into_view_if_needed()
         more_btn.click()
 
+    # already routed (fast SPA): nothing to wait for
+    if _is_profile_url(page.url):
+        return
+
     # wait for SPA url change; then fallback to profile-only UI
     try:
-        page.wait_for_url(PROFILE_URL_RE, timeout=timeout)
+        page.wait_for_url(_is_profile_url, timeout=timeout)
     except PlaywrightTimeoutError:
+        wait_for_contact_controls(page, cap_ms=min(3000, timeout))
+
+def open_first_profile_from_serp(page: Page, timeout: int = 15000) -> None:
+    """Open the first card on the current SERP (same path as open_profile_from_card)."""
+    open_profile_from_card(page, get_serp_cards(page, timeout).first, timeout)
+
+# Extractors only read text/attributes; never download these
+_BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+# Analytics / ad hosts (suffix match); stylesheets stay, visibility waits need them
+_BLOCKED_HOST_SUFFIXES = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "mc.yandex.ru",
+    "top-fwz1.mail.ru",
+    "connect.facebook.net",
+)
+
+# "." + suffix, so a blocked "mc.yandex.ru" does not also match "notmc.yandex.ru"
+_BLOCKED_DOT_SUFFIXES = tuple("." + h for h in _BLOCKED_HOST_SUFFIXES)
+
+def _is_blocked_host(host: str) -> bool:
+    return host in _BLOCKED_HOST_SUFFIXES or host.endswith(_BLOCKED_DOT_SUFFIXES)
+
+def _block_heavy_resources(route: Route) -> None:
+    request = route.request
+    if request.resource_type in _BLOCKED_RESOURCE_TYPES:
+        route.abort()
+        return
+    host = urlparse(request.url).hostname or ""
+    if _is_blocked_host(host):
+        route.abort()
+    else:
+        route.continue_()
+
+def new_light_context(browser: Browser, **context_kwargs) -> BrowserContext:
+    """New browser context that skips images/fonts/media and trackers (text scraping only)."""
+    context = browser.new_context(**context_kwargs)
+    install_overlay_dismisser(context)
+    context.route("**/*", _block_heavy_resources)
+    return context
+
+class ProfileBatchPool:
+    """
+    Long-lived pool for scraping profile URLs in parallel, kept up across
+    SERP pages so Chromium and the worker contexts start once per run.
+
+    The sync Playwright API is bound to the thread that started it, so each
+    worker thread launches its own Chromium (no remote-debugging port is
+    opened: the contexts carry the logged-in session). A worker reuses a
+    single light context and page for every URL it pulls off the shared
+    queue; `scrape(page)` is called once the profile has loaded.
+
+    Threads start lazily on the first run(); use as a context manager (or
+    call close()). Keep `max_concurrency` small — the site bans aggressive crawls.
+    """
+
+    def __init__(
+        self,
+        *,
+        storage_state: Optional[str] = None,
+        headless: bool = True,
+        max_concurrency: int = 5,
+    ):
+        self.storage_state = storage_state
+        self.headless = headless
+        self.max_concurrency = max(1, max_concurrency)
+        self._jobs: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._pending = 0
+        self._cv = threading.Condition()
+        self._workers: List[threading.Thread] = []
+
+    def __enter__(self) -> "ProfileBatchPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _start(self) -> None:
+        self._workers = [
+            threading.Thread(target=self._worker_main, daemon=True)
+            for _ in range(self.max_concurrency)
+        ]
+        for t in self._workers:
+            t.start()
+
+    def _job_done(self) -> None:
+        with self._cv:
+            self._pending -= 1
+            self._cv.notify_all()
+
+    def _worker_main(self) -> None:
         try:
-            page.locator("text=НАПИСАТЬ, a[href^='tel:']").first.wait_for(
-                state="visible", timeout=timeout
-            )
-        except PlaywrightTimeoutError:
-            pass
+            with sync_playwright() as p:
+                browser = p.chromium.launch(headless=self.headless)
+                try:
+                    context = new_light_context(browser, storage_state=self.storage_state)
+                    page = context.new_page()
+                    while True:
+                        job = self._jobs.get()
+                        if job is None:
+                            return
+                        i, url, scrape, results = job
+                        try:
+                            page.goto(url, wait_until="domcontentloaded")
+                            results[i] = scrape(page)
+                        except Exception as e:
+                            print(f"[BATCH] {url} failed: {e}", flush=True)
+                        finally:
+                            self._job_done()
+                finally:
+                    browser.close()
+        except Exception as e:
+            print(f"[BATCH] worker failed: {e}", flush=True)
+
+    def run(self, card_urls: List[str], scrape: Callable[[Page], dict]) -> List[Optional[dict]]:
+        """Scrape `card_urls`; results in the same order (None where a profile failed)."""
+        results: List[Optional[dict]] = [None] * len(card_urls)
+        if not card_urls:
+            return results
+        if not self._workers:
+            self._start()
+        with self._cv:
+            self._pending += len(card_urls)
+        for i, url in enumerate(card_urls):
+            self._jobs.put((i, url, scrape, results))
+        with self._cv:
+            while self._pending:
+                if not any(t.is_alive() for t in self._workers):
+                    # every worker died: drop what is left instead of waiting forever
+                    while True:
+                        try:
+                            self._jobs.get_nowait()
+                        except queue.Empty:
+                            break
+                    self._pending = 0
+                    break
+                self._cv.wait(timeout=1.0)
+        return results
+
+    def close(self) -> None:
+        if not self._workers:
+            return
+        for _ in self._workers:
+            self._jobs.put(None)
+        for t in self._workers:
+            t.join()
+        self._workers = []
+
+def extract_profiles_batch(
+    card_urls: List[str],
+    scrape: Callable[[Page], dict],
+    *,
+    storage_state: Optional[str] = None,
+    headless: bool = True,
+    max_concurrency: int = 5,
+) -> List[Optional[dict]]:
+    """
+    One-off ProfileBatchPool run: scrape many profile URLs in parallel with
+    a bounded pool of workers. Returns results in the same order as
+    `card_urls` (None where a profile failed).
+    """
+    n = max(1, min(max_concurrency, len(card_urls)))
+    with ProfileBatchPool(
+        storage_state=storage_state, headless=headless, max_concurrency=n
+    ) as pool:
+        return pool.run(card_urls, scrape)
+
+@dataclass
+class ProfileContext:
+    """
+    An open profile page plus reads shared between extractors.
+    `html` is fetched with page.content() on first use and reused afterwards,
+    so name/age/experience cost one HTML transfer instead of three.
+    `jsonld` holds the page's JSON-LD objects, so those fields are dict
+    lookups instead of regex scans over the whole HTML.
+    Create a fresh one per profile (after navigation).
+    """
+    page: Page
+    _html: Optional[str] = field(default=None, repr=False)
+    _blob: Optional[dict] = field(default=None, repr=False)
+    _jsonld: Optional[List[dict]] = field(default=None, repr=False)
+
+    @property
+    def html(self) -> str:
+        if self._html is None:
+            self._html = self.page.content()
+        return self._html
+
+    @property
+    def blob(self) -> dict:
+        """All DOM-read fields in one round-trip (see scrape_profile_blob); {} if that failed."""
+        if self._blob is None:
+            self._blob = scrape_profile_blob(self.page)
+        return self._blob
+
+    @property
+    def jsonld(self) -> List[dict]:
+        """Parsed <script type="application/ld+json"> objects, flattened; [] if none."""
+        if self._jsonld is None:
+            sources = self.blob.get("jsonLd")
+            if sources is None:  # DOM read failed: cut the scripts out of the HTML instead
+                sources = _JSONLD_RE.findall(self.html)
+            self._jsonld = _parse_jsonld(sources)
+        return self._jsonld
+
+    def absent(self, sel: str) -> bool:
+        """True if the profile is rendered and `sel` matches nothing: answer "no" without waiting."""
+        return bool(self.blob) and self.page.locator(sel).count() == 0
+
+    def html_lacks(self, *needles: str) -> bool:
+        """
+        True if the profile is rendered, its HTML was already fetched, and none
+        of `needles` occur in it (a free substring reject; never fetches HTML).
+        """
+        html = self._html
+        return html is not None and bool(self.blob) and not any(n in html for n in needles)
+
+    def jsonld_get(self, key: str) -> Any:
+        """First value for `key` in the JSON-LD, preferring the Person object."""
+        objs = self.jsonld
+        for obj in sorted(objs, key=lambda o: o.get("@type") != "Person"):
+            if obj.get(key) not in (None, ""):
+                return obj[key]
+        return None
+
+
+def _parse_jsonld(sources: List[str]) -> List[dict]:
+    out: List[dict] = []
+    for src in sources:
+        try:
+            data = json.loads(src)
+        except (TypeError, ValueError):
+            continue
+        stack = data if isinstance(data, list) else [data]
+        for obj in stack:
+            if not isinstance(obj, dict):
+                continue
+            out.append(obj)
+            graph = obj.get("@graph")
+            if isinstance(graph, list):
+                out.extend(g for g in graph if isinstance(g, dict))
+    return out
+
+# Every DOM-read profile field in one pass. A field is null when its block is
+# absent, so extractors can fall back to their (waiting) locator path.
+_PROFILE_BLOB_JS = """
+(audioSel) => {
+  const q = (sel) => document.querySelector(sel);
+  const text = (el) => el ? el.innerText : null;
+  const blockByTitle = (titleSel, title) => Array.from(document.querySelectorAll('div.block'))
+    .find(b => Array.from(b.querySelectorAll(titleSel)).some(t => t.innerText.includes(title))) || null;
+
+  const about = q('div.about__content div.about__texts');
+  const eduBlock = q('nn-worker-educations') || blockByTitle('h2.block__title', 'Образование');
+  const tale = q('nn-voice-acting-tales') || blockByTitle('.block__title', 'Записанные сказки');
+  const recList = q('nn-resume-recommendation-list');
+  let recs = null;
+  if (recList) {
+    let items = recList.querySelectorAll('.recomm__content');
+    if (!items.length) items = recList.querySelectorAll('.recomm__item, li, nn-resume-recommendation-item');
+    recs = Array.from(items).slice(0, 12).map(e => e.innerText);
+  }
+  return {
+    name: text(q('h1.profile-header__title')),
+    altImg: q('img.card__img')?.getAttribute('alt') ?? null,
+    address: text(q('.about__address .show-address__content a.show-address__link')),
+    aboutParas: about ? Array.from(about.querySelectorAll('p')).map(p => p.innerText) : null,
+    educationRaw: text(eduBlock?.querySelector('.block__footer')),
+    recs: recs,
+    hasAudio: !!q(audioSel) || (document.body?.innerText || '').includes('Аудио-обращение'),
+    // a rendered tales block only counts once its player is mounted
+    hasTale: !!tale && (tale.getClientRects().length === 0 || !!tale.querySelector('audio, nn-audio-player')),
+    jsonLd: Array.from(document.querySelectorAll('script[type="application/ld+json"]')).map(s => s.textContent),
+  };
+}
+"""
+
+def scrape_profile_blob(page: Page, timeout: int = 5000) -> dict:
+    """
+    Read all DOM-based profile fields with a single page.evaluate.
+    Waits for the profile header first (the page's readiness signal).
+    Returns {} if the evaluate fails.
+    """
+    try:
+        page.locator(_NAME_SEL).first.wait_for(state="visible", timeout=timeout)
+    except PlaywrightTimeoutError:
+        pass
+    try:
+        return page.evaluate(_PROFILE_BLOB_JS, _AUDIO_SEL) or {}
+    except Exception:
+        return {}
+
+# Embedded JSON usually sits in <head>: scan this many chars before the whole page
+_HEAD_WINDOW = 65536
+
+def _search_head(rx: "re.Pattern[str]", html: str) -> Optional["re.Match[str]"]:
+    """rx.search over the first _HEAD_WINDOW chars (endpos, no copy), then the full HTML."""
+    m = rx.search(html, 0, _HEAD_WINDOW)
+    if m is None and len(html) > _HEAD_WINDOW:
+        m = rx.search(html)
+    return m
 
-def extract_name_from_profile(page, timeout=5000):
+def _as_ctx(page_or_ctx: Union[Page, ProfileContext]) -> ProfileContext:
+    return page_or_ctx if isinstance(page_or_ctx, ProfileContext) else ProfileContext(page_or_ctx)
+
+def extract_name_from_profile(page_or_ctx, timeout=5000):
     """
-    Extract nanny name from profile page.
+    Extract nanny name from profile page (Page or ProfileContext).
     Strategy:
       1) h1.profile-header__title (fast, clean)
       2) fallback: <img.card__img alt="... - Имя"> => take the trailing part
       3) fallback: search in page HTML for "alt" or "name":"..."
     """
-    # 1) h1 on profile
-    loc = page.locator("h1.profile-header__title")
-    try:
-        loc.wait_for(state="visible", timeout=timeout)
-        name = loc.inner_text().strip()
+    ctx = _as_ctx(page_or_ctx)
+    page = ctx.page
+    blob = ctx.blob
+
+    # 1) h1 on profile (the batched read already waited for it)
+    if blob:
+        name = (blob.get("name") or "").strip()
         if name:
             return name
-    except TimeoutError:
-        pass
-    except PlaywrightTimeoutError:
-        pass
+    else:
+        loc = page.locator(_NAME_SEL)
+        try:
+            loc.wait_for(state="visible", timeout=timeout)
+            name = loc.inner_text().strip()
+            if name:
+                return name
+        except TimeoutError:
+            pass
+        except PlaywrightTimeoutError:
+            pass
 
     # 2) image alt fallback
     try:
-        alt_text = page.locator("img.card__img").first.get_attribute("alt") or ""
+        if blob:
+            alt_text = blob.get("altImg") or ""
+        else:
+            alt_text = page.locator("img.card__img").first.get_attribute("alt") or ""
         if alt_text:
             # Example: "Няня в городе Москва - Анжела Юрьевна А."
             parts = alt_text.split(" - ")
@@ -520,9 +966,11 @@ def extract_name_from_profile(page, timeout=5000):
     except Exception:
         pass
 
-    # 3) last resort: scan HTML
-    html = page.content()
-    m = re.search(r'"name"\s*:\s*"([^"]+)"', html)
+    # 3) last resort: JSON-LD, then scan HTML
+    name = ctx.jsonld_get("name")
+    if isinstance(name, str) and name.strip():
+        return name.strip()
+    m = _search_head(_NAME_RE, ctx.html)
     if m:
         return m.group(1)
 
@@ -531,21 +979,21 @@ def extract_name_from_profile(page, timeout=5000):
 def _compute_age(birth: date, today: Optional[date] = None) -> int:
     if today is None:
         today = date.today()
-    years = today.year - birth.year
-    if (today.month, today.day) < (birth.month, birth.day):
-        years -= 1
-    return years
+    # subtract one if this year's birthday hasn't come yet (MMDD compare, no tuples)
+    return today.year - birth.year - (today.month * 100 + today.day < birth.month * 100 + birth.day)
 
-def extract_age_from_profile(page, timeout=3000) -> Optional[int]:
+def extract_age_from_profile(page_or_ctx, timeout=3000) -> Optional[int]:
     """
-    Extract age from the profile page.
+    Extract age from the profile page (Page or ProfileContext).
     """
-    html = page.content()
-
-    # 1) Try to parse "birthDate":"..."
-    m = re.search(r'"birthDate"\s*:\s*"([^"]+)"', html)
-    if m:
-        iso = m.group(1)
+    ctx = _as_ctx(page_or_ctx)
+
+    # 1) Try to parse "birthDate":"..." (JSON-LD lookup; HTML scan only if absent)
+    iso = ctx.jsonld_get("birthDate")
+    if not isinstance(iso, str):
+        m = _search_head(_BIRTHDATE_RE, ctx.html)
+        iso = m.group(1) if m else None
+    if iso:
         try:
             if iso.endswith("Z"):
                 dt = datetime.fromisoformat(iso.replace("Z", "+00:00"))
@@ -555,10 +1003,11 @@ def extract_age_from_profile(page, timeout=3000) -> Optional[int]:
         except Exception:
             pass
 
-    # 2) Fallback: look for "XX лет"
+    # 2) Fallback: look for "XX лет" in the *visible* text only (raw HTML also
+    #    carries hidden nodes and embedded data, e.g. children's ages)
     try:
-        body_text = page.inner_text("body", timeout=timeout)
-        m2 = re.search(r'(\d{1,3})\s*лет', body_text)
+        body_text = ctx.page.inner_text("body", timeout=timeout)
+        m2 = _YEARS_RE.search(body_text)
         if m2:
             return int(m2.group(1))
     except Exception:
@@ -585,31 +1034,32 @@ def parse_ru_duration_to_min(txt: str) -> Optional[int]:
     txt = (txt or "").replace("\u00a0", " ")
 
     # Case 1: hours + minutes, e.g. "1 ч 5 мин"
-    m = re.search(r"(\d+)\s*ч(?:\D+?(\d+)\s*мин)?", txt)
+    m = _DUR_HM_RE.search(txt)
     if m:
         h = int(m.group(1))
         mm = int(m.group(2)) if m.group(2) else 0
         return h * 60 + mm
 
     # Case 2: minutes only, e.g. "40 мин"
-    m = re.search(r"(\d+)\s*мин", txt)
+    m = _DUR_MIN_RE.search(txt)
     if m:
         return int(m.group(1))
 
     # Case 3: hours only, e.g. "1 ч"
-    m = re.search(r"(\d+)\s*ч\b", txt)
+    m = _DUR_H_RE.search(txt)
     if m:
         return int(m.group(1)) * 60
 
     return None
 
+@functools.lru_cache(maxsize=8)  # one home address per crawl; normalized once
 def _normalize_home_address(addr: str) -> str:
     s = (addr or "").strip()
-    s = re.sub(r"^\s*г\.?\s*", "", s, flags=re.I)      # drop leading "г"/"г."
-    s = re.sub(r"\bд\.?\s*", "", s, flags=re.I)        # drop "д "
-    s = re.sub(r"\s+к\.?\s*", "к", s, flags=re.I)      # "к 2" -> "к2"
-    s = re.sub(r"\s+", " ", s).strip()
-    if not re.search(r"\bМосква\b", s, flags=re.I):
+    s = _NORM_G_RE.sub("", s)       # drop leading "г"/"г."
+    s = _NORM_D_RE.sub("", s)       # drop "д "
+    s = _NORM_K_RE.sub("к", s)      # "к 2" -> "к2"
+    s = _NORM_WS_RE.sub(" ", s).strip()
+    if not _NORM_MSK_RE.search(s):
         s = "Москва, " + s
     return s
 
@@ -633,17 +1083,17 @@ def extract_travel_time_via_yandex(page, home_address: str = "", timeout: int =
         # 2) Get nanny coords (prefer Google q=lat,lon; fallback rtext second point)
         n_lat = n_lon = None
         try:
-            g = page.locator(".about__address .show-address__content a.show-address__link").first
+            g = page.locator(_ADDRESS_SEL).first
             ghref = g.get_attribute("href") or ""
             if dbg: print(f"[YAMAPS] google href: {ghref}", flush=True)
-            m = re.search(r"maps/\?q=([-\d\.]+),([-\d\.]+)", ghref)
+            m = _YM_Q_RE.search(ghref)
             if m:
                 n_lat, n_lon = map(float, m.groups())
         except Exception as e:
             if dbg: print(f"[YAMAPS] google coords failed: {e}", flush=True)
 
         if n_lat is None or n_lon is None:
-            m = re.search(r"rtext=[^~]+~([-\d\.]+),([-\d\.]+)", href)
+            m = _YM_RTEXT_RE.search(href)
             if m:
                 n_lat, n_lon = map(float, m.groups())
         if dbg: print(f"[YAMAPS] nanny coords: {n_lat},{n_lon}", flush=True)
@@ -713,7 +1163,7 @@ def extract_travel_time_via_yandex(page, home_address: str = "", timeout: int =
         finally:
             try:
                 page.bring_to_front()
-                page.locator("text=НАПИСАТЬ, a[href^='tel:']").first.wait_for(timeout=1200)
+                _contact_controls(page).wait_for(timeout=1200)
             except Exception:
                 pass
 
@@ -722,15 +1172,22 @@ def extract_travel_time_via_yandex(page, home_address: str = "", timeout: int =
         if dbg: print(f"[YAMAPS] error: {e}", flush=True)
         return None
 
-def extract_location_from_profile(page, timeout: int = 4000) -> Optional[str]:
+def extract_location_from_profile(page_or_ctx, timeout: int = 4000) -> Optional[str]:
     """
     Reads the address text from the profile page:
     <a class="show-address__link">Москва, Калужская</a>
     Returns a cleaned string or None.
     """
+    ctx = _as_ctx(page_or_ctx)
+    page = ctx.page
+    txt = ctx.blob.get("address")
+    if txt is not None:
+        return " ".join(txt.replace("\xa0", " ").split()) or None
+
     try:
-        sel = ".about__address .show-address__content a.show-address__link"
-        el = page.locator(sel).first
+        if ctx.absent(_ADDRESS_SEL):
+            return None
+        el = page.locator(_ADDRESS_SEL).first
         el.wait_for(state="attached", timeout=timeout)
         txt = (el.inner_text() or "").strip()
         # collapse nbsp and extra spaces
@@ -740,61 +1197,120 @@ def extract_location_from_profile(page, timeout: int = 4000) -> Optional[str]:
     except Exception:
         return None
 
-def extract_experience_from_profile(page, timeout=3000) -> Optional[int]:
+def extract_experience_from_profile(page_or_ctx, timeout=3000) -> Optional[int]:
     """
-    Years of experience (Опыт).
+    Years of experience (Опыт), from a Page or ProfileContext.
     1) Parse embedded JSON: "experienceAge": <int>
     2) Fallback: read the visible stat 'Лет опыта'
     Returns int or None.
     """
-    html = page.content()
-
-    # 1) JSON field
-    m = re.search(r'"experienceAge"\s*:\s*(\d+)', html)
-    if m:
+    ctx = _as_ctx(page_or_ctx)
+    page = ctx.page
+
+    # 1) JSON field (JSON-LD lookup; HTML scan only if absent)
+    exp = ctx.jsonld_get("experienceAge")
+    if exp is None:
+        m = _search_head(_EXPERIENCE_RE, ctx.html)
+        exp = m.group(1) if m else None
+    if exp is not None:
         try:
-            return int(m.group(1))
-        except ValueError:
+            return int(exp)
+        except (TypeError, ValueError):
             pass
 
     # 2) Visible block: ... <div class="catalog-stats__value">12</div> <div class="catalog-stats__type">Лет опыта</div>
+    #    polled in the browser (every 100 ms, not every frame) until it renders: one round-trip
     try:
-        xp_value_loc = page.locator(
-            "xpath=//div[contains(@class,'catalog-stats__item')]"
-            "[.//div[contains(@class,'catalog-stats__type')][normalize-space()='Лет опыта']]"
-            "//div[contains(@class,'catalog-stats__value')][1]"
-        ).first
-        xp_value_loc.wait_for(state="visible", timeout=timeout)
-        txt = xp_value_loc.inner_text().strip()
-        # keep only digits
-        digits = re.findall(r"\d+", txt)
-        if digits:
-            return int(digits[0])
+        txt = page.wait_for_function(_EXP_STAT_JS, polling=100, timeout=timeout).json_value()
+        m = _DIGITS_RE.search(txt or "")
+        if m:
+            return int(m.group())
     except Exception:
         pass
 
     return None
 
+# block_audio as a class on an element (not stylesheet/selector text)
+_BLOCK_AUDIO_CLASS_RE = re.compile(r"""class=["'][^"']*\bblock_audio\b""")
+_TALE_PLAYER_MARKERS = ("<audio", "<nn-audio-player", "audio.nashanyanya.ru")
+
+def _html_has_audio(html: str) -> Optional[bool]:
+    """True if the HTML shows an audio message; None = unknown (probe the DOM)."""
+    if ("audio.nashanyanya.ru" in html or _html_has_tag(html, "nn-audio-message")
+            or _BLOCK_AUDIO_CLASS_RE.search(html)):
+        return True
+    return None
+
+def _html_has_tag(html: str, tag: str) -> bool:
+    return html.find(f"<{tag}") != -1
+
+def _html_has_tale(html: str) -> Optional[bool]:
+    """
+    True if the tales block in the HTML carries a player; None = unknown (probe
+    the DOM). A block without a player is not a "yes" (same rule as hasTale).
+    """
+    start = html.find("<nn-voice-acting-tales")
+    if start == -1:
+        return None
+    end = html.find("</nn-voice-acting-tales>", start)
+    block = html[start:end] if end != -1 else html[start:]
+    return True if any(m in block for m in _TALE_PLAYER_MARKERS) else None
+
+def extract_profile_bundle(page_or_ctx) -> dict:
+    """
+    Name, age, experience and audio flags off one ProfileContext: a single
+    page.content() (only if JSON-LD lacks a field) shared by all of them;
+    page is touched again only for the visible-DOM fallbacks.
+    """
+    ctx = _as_ctx(page_or_ctx)
+    out = {
+        "name":       extract_name_from_profile(ctx),
+        "age":        extract_age_from_profile(ctx),
+        "experience": extract_experience_from_profile(ctx),
+    }
+    # if the HTML was fetched above, a substring test answers the common "yes" case
+    html = ctx._html
+    out["has_audio"] = bool(html and _html_has_audio(html)) or extract_has_audio_from_profile(ctx)
+    out["has_fairy_tale_audio"] = bool(html and _html_has_tale(html)) or extract_has_fairy_tale_audio(ctx)
+    return out
+
+def extract_all_fields(page_or_ctx) -> dict:
+    """
+    Every DOM/JSON profile field in one call: extract_profile_bundle plus
+    about, education, recommendations and location. All of them read the
+    same single-evaluate DOM blob (and at most one page.content()); the page
+    is only queried again for fields the blob could not see.
+    """
+    ctx = _as_ctx(page_or_ctx)
+    out = extract_profile_bundle(ctx)
+    out["about"] = extract_about_from_profile(ctx)
+    out["education"] = extract_education_from_profile(ctx)
+    out["recommendations"] = extract_recommendations_from_profile(ctx)
+    out["location"] = extract_location_from_profile(ctx)
+    return out
+
 
 def _clean_para(s: str) -> str:
     # normalize whitespace but keep bullets/line breaks readable
-    s = s.replace(NBSP, " ").replace("\r", "")
-    # collapse 3+ newlines → two, and spaces around dashes
-    s = re.sub(r"\n{3,}", "\n\n", s)
-    # trim each line
-    lines = [ln.strip() for ln in s.splitlines()]
-    s = "\n".join([ln for ln in lines if ln])
+    s = s.translate(_PARA_TRANS)
+    # trim each line and drop empty ones (whitespace around a newline -> one newline)
+    s = _WS_RUN_RE.sub("\n", s)
     return s.strip()
 
-def extract_about_from_profile(page, timeout=2500) -> Optional[str]:
+def extract_about_from_profile(page_or_ctx, timeout=2500) -> Optional[str]:
     """
     Extract 'О себе' from profile page.
     """
-    container = page.locator("div.about__content div.about__texts").first
-    container.wait_for(state="visible", timeout=timeout)
+    ctx = _as_ctx(page_or_ctx)
+    paras = ctx.blob.get("aboutParas")
+    if paras is None:
+        if ctx.absent(_ABOUT_SEL):
+            return None
+        container = ctx.page.locator(_ABOUT_SEL).first
+        container.wait_for(state="visible", timeout=timeout)
 
-    # collect all <p> elements inside
-    paras = container.locator("p").all_inner_texts()
+        # collect all <p> elements inside
+        paras = container.locator("p").all_inner_texts()
     if not paras:
         return None
 
@@ -803,91 +1319,107 @@ def extract_about_from_profile(page, timeout=2500) -> Optional[str]:
     return about_text or None
 
 
-def extract_education_from_profile(page, timeout: int = 2500) -> str:
+def extract_education_from_profile(page_or_ctx, timeout: int = 2500) -> str:
     """
     Returns the 'Образование' block as a single cleaned string.
     Falls back to locating the block by its header text.
     """
+    ctx = _as_ctx(page_or_ctx)
+    page = ctx.page
+    raw = ctx.blob.get("educationRaw")
+    if raw is not None:
+        return " ".join(raw.split())
+
     # Primary: the footer of the education block
-    candidates = [
-        page.locator("nn-worker-educations .block__footer"),
-        page.locator("div.block:has(h2.block__title:has-text('Образование')) .block__footer"),
-    ]
-    for loc in candidates:
+    # one union locator: whichever variant the page uses resolves within a single wait
+    sel = ", ".join(_EDU_SELS)
+    if ctx.absent(sel):
+        return ""
+    loc = page.locator(sel).first
+    try:
+        loc.wait_for(state="visible", timeout=timeout)
+        raw = loc.inner_text().strip()
+    except PlaywrightTimeoutError:
+        return ""
+    # collapse whitespace & line breaks
+    return " ".join(raw.split())
+
+def _texts_from_handles(loc: Locator, limit: int) -> List[str]:
+    """inner_text of the first `limit` matches, resolved once (no nth(i) re-resolution); failures skipped."""
+    try:
+        handles = loc.element_handles()[:limit]
+    except Exception:
+        return []
+    texts: List[Optional[str]] = [None] * len(handles)
+    for i, h in enumerate(handles):
         try:
-            loc.wait_for(state="visible", timeout=timeout)
-            raw = loc.inner_text().strip()
-            # collapse whitespace & line breaks
-            cleaned = " ".join(line.strip() for line in raw.splitlines() if line.strip())
-            return cleaned
-        except PlaywrightTimeoutError:
-            continue
-    return ""
+            texts[i] = h.inner_text()
+        except Exception:
+            pass
+    return [t for t in texts if t]
 
-def extract_recommendations_from_profile(page, timeout: int = 1200):
+def extract_recommendations_from_profile(page_or_ctx, timeout: int = 1200):
     """
     Return list[str] or None. Never blocks the crawl if the section is absent.
     """
-    sel = "nn-resume-recommendation-list"
-    cont = page.locator(sel).first
-    try:
-        cont.wait_for(state="attached", timeout=timeout)  # visible not required
-    except PlaywrightTimeoutError:
-        return None
-
-    # Primary: each recommendation’s body
-    items = cont.locator(".recomm__content")
-
-    # Fallbacks for older variants (your previous logic)
-    if items.count() == 0:
-        items = cont.locator(".recomm__item, li, nn-resume-recommendation-item")
-
-    n = items.count()
-    if n == 0:
-        return None
+    ctx = _as_ctx(page_or_ctx)
+    texts = ctx.blob.get("recs")
+    if texts is None:
+        if ctx.html_lacks("<" + _RECS_LIST_SEL) or ctx.absent(_RECS_LIST_SEL):
+            return None
+        cont = ctx.page.locator(_RECS_LIST_SEL).first
+        # the DOM read already saw a rendered profile without the list: only allow a late mount
+        t = min(300, timeout) if ctx.blob else timeout
+        try:
+            cont.wait_for(state="attached", timeout=t)  # visible not required
+        except PlaywrightTimeoutError:
+            return None
 
-    out = []
-    for i in range(min(n, 12)):
+        # All item texts in one round-trip per variant (no count() probe, no per-item inner_text)
         try:
-            t = (items.nth(i).inner_text(timeout=800) or "").strip()
-            # Optional: drop leading "РЕКОМЕНДАЦИЯ" label if present
-            t = re.sub(r"^\s*РЕКОМЕНДАЦИЯ\s*", "", t, flags=re.IGNORECASE)
-            t = _clean_para(t)  # reuse your normalizer
-            if t:
-                out.append(t)
+            # Primary: each recommendation’s body
+            texts = cont.locator(_RECS_ITEM_SEL).all_inner_texts()
+            # Fallbacks for older variants (your previous logic)
+            if not texts:
+                texts = cont.locator(_RECS_ITEM_OLD_SEL).all_inner_texts()
         except Exception:
+            # a node re-rendered mid-read: resolve the items once, read each separately
+            texts = _texts_from_handles(cont.locator(f"{_RECS_ITEM_SEL}, {_RECS_ITEM_OLD_SEL}"), 12)
+            if not texts:
+                return None
+        texts = texts[:12]
+
+    out = []
+    for t in texts:
+        if not t or t.isspace():
             continue
+        # Optional: drop leading "РЕКОМЕНДАЦИЯ" label if present
+        t = _REC_LABEL_RE.sub("", t.strip())
+        t = _clean_para(t)  # reuse your normalizer
+        if t:
+            out.append(t)
 
     return out or None
 
-def extract_has_audio_from_profile(page, timeout: int = 4000) -> bool:
+def extract_has_audio_from_profile(page_or_ctx, timeout: int = 4000) -> bool:
     """
     True if the profile has an audio message block/player, else False.
     Robust against lazy mounting and hidden <audio> elements.
-    Avoids mixing selector engines (CSS vs text=).
+    The common case is answered by a single DOM probe (one CDP call, no waiters).
     """
+    ctx = _as_ctx(page_or_ctx)
+    page = ctx.page
     # keep waits small to avoid stalls
     t = min(700, timeout)
 
-    # 1) Any known wrapper/component (CSS only)
-    try:
-        wrapper = page.locator("div.block.block_audio, nn-audio-message, nn-audio-player").first
-        if wrapper.is_visible(timeout=t):
-            return True
-        # accept attached (component mounted but not yet painted/in-viewport)
-        wrapper.wait_for(state="attached", timeout=t)
+    # 1) One probe: wrapper/component, raw <audio> (often hidden), or the block title
+    if ctx.blob.get("hasAudio"):
         return True
-    except PlaywrightTimeoutError:
-        pass
-
-    # 2) Title text check (use text engine separately — NOT in the comma list)
-    try:
-        if page.get_by_text("Аудио-обращение").first.is_visible(timeout=t):
-            return True
-    except PlaywrightTimeoutError:
-        pass
+    # no host element anywhere in the rendered HTML: nothing to lazy-mount
+    if ctx.html_lacks("<nn-audio-message", "<nn-audio-player", "block_audio", "<audio"):
+        return False
 
-    # 3) Nudge scroll once to trigger lazy mount, then look for raw <audio>
+    # 2) Nudge scroll once to trigger lazy mount, then give it one short wait
     try:
         page.evaluate("""
             () => {
@@ -903,38 +1435,33 @@ def extract_has_audio_from_profile(page, timeout: int = 4000) -> bool:
 
     try:
         # don't require visible; many players keep <audio> hidden
-        audio = page.locator("audio[src*='audio.nashanyanya.ru'], audio[src$='.mp3']").first
-        audio.wait_for(state="attached", timeout=t)
+        page.locator(_AUDIO_SEL).first.wait_for(state="attached", timeout=t)
         return True
     except PlaywrightTimeoutError:
         return False
 
 
-def extract_has_fairy_tale_audio(page, timeout: int = 4000) -> bool:
+def extract_has_fairy_tale_audio(page_or_ctx, timeout: int = 4000) -> bool:
     """
     True if the profile has 'Записанные сказки' with an audio player.
     """
+    ctx = _as_ctx(page_or_ctx)
+    page = ctx.page
     t = min(700, timeout)
 
-    try:
-        blk = page.locator(
-            "nn-voice-acting-tales, "
-            "div.block:has(.block__title:has-text('Записанные сказки'))"
-        ).first
-        if blk.is_visible(timeout=t):
-            # accept attached audio inside block
-            blk.locator("audio, nn-audio-player").first.wait_for(state="attached", timeout=t)
-            return True
-        blk.wait_for(state="attached", timeout=t)
+    # 1) One probe: block present (hidden, or rendered with its player mounted)
+    if ctx.blob.get("hasTale"):
         return True
-    except PlaywrightTimeoutError:
-        pass
+    if ctx.html_lacks("<nn-voice-acting-tales", "Записанные сказки"):
+        return False
 
+    # 2) Nudge scroll once to trigger lazy mount, then one wait on any tale player
     try:
         page.evaluate("""
             () => {
               const el = document.querySelector('nn-voice-acting-tales')
-                   || document.querySelector("div.block:has(.block__title:has-text('Записанные сказки'))");
+                   || Array.from(document.querySelectorAll('div.block'))
+                        .find(b => (b.querySelector('.block__title')?.innerText || '').includes('Записанные сказки'));
               if (el) el.scrollIntoView({behavior: 'instant', block: 'center'});
               else window.scrollBy(0, Math.min(1200, document.body.scrollHeight));
             }
@@ -943,8 +1470,7 @@ def extract_has_fairy_tale_audio(page, timeout: int = 4000) -> bool:
         pass
 
     try:
-        node = page.locator("nn-voice-acting-tales audio[src*='audio.nashanyanya.ru']").first
-        node.wait_for(state="attached", timeout=t)
+        page.locator(_TALE_PLAYER_SEL).first.wait_for(state="attached", timeout=t)
         return True
     except PlaywrightTimeoutError:
         return False
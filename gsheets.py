@@ -1,14 +1,17 @@
 # gsheets.py
 from __future__ import annotations
 
+import atexit
 import datetime as dt
+import functools
+import itertools
+import operator
+import random
+import time
 from typing import Dict, List, Tuple, Optional, Any
+from urllib.parse import urlsplit, urlunsplit
 import re
 import gspread
-from gspread.cell import Cell
-from gspread_formatting import cellFormat, color, format_cell_range
-from gspread_formatting import DataValidationRule, BooleanCondition, set_data_validation_for_cell_range
-from gspread.utils import rowcol_to_a1
 
 # ------------------------- Sheet & headers -------------------------
 
@@ -46,6 +49,11 @@ HUMAN_NANNIES_HEADERS: List[str] = [
 ]
 
 NANNIES_HEADERS: List[str] = MACHINE_NANNIES_HEADERS + HUMAN_NANNIES_HEADERS
+_HEADER_INDEX: Dict[str, int] = {h: i for i, h in enumerate(NANNIES_HEADERS)}  # zero-based
+
+# Row dict -> values in NANNIES_HEADERS order ("" for missing keys), via one C-level itemgetter
+_DEFAULTS = dict.fromkeys(NANNIES_HEADERS, "")
+_GETTER = operator.itemgetter(*NANNIES_HEADERS)
 
 # For updates on existing rows, we ONLY touch these:
 MACHINE_UPDATE_COLS = [
@@ -60,6 +68,26 @@ MACHINE_UPDATE_COLS = [
     # "has_fairy_tale_audio",
 ]
 
+# Defaults for brand-new rows (first/last_seen_at are added per upsert)
+_STATIC_DEFAULTS = {
+    "profile_url": "",
+    "status": "Новый",
+    "notes": "",
+    "last_contacted_at": "",
+}
+
+_MACHINE_TUPLE = tuple(MACHINE_UPDATE_COLS)  # fixed order, iterated per scraped row
+
+# Cell values sent as-is in value writes (anything else, e.g. datetime, is str()-ed)
+_JSON_SCALARS = (str, int, float)
+
+# Rows past the last data row that still get the status dropdown / colors
+# (reapplied on every fresh load, so this only has to cover one run's inserts)
+FORMAT_ROW_HEADROOM = 500
+
+# Sheets aborts very large value writes (~50k cells / 10 MB); stay well below
+MAX_CELLS_PER_BATCH = 40000
+
 PID_FIELD = "profile_id"
 URL_FIELD = "profile_url"
 
@@ -89,6 +117,40 @@ STATUSES_ALLOWED = [
 # === One-time sheet context cache (avoid re-opening/re-reading per page) ===
 _SHEETS_CTX: Dict[tuple[str, str], Dict[str, Any]] = {}
 
+# === Retry with backoff on quota / transient errors ===
+# A 429 used to abort the whole upsert, so the next run redid the same work.
+SHEETS_RETRY_ATTEMPTS = 5
+_RETRY_STATUSES = (429, 503)
+# Appends are not idempotent: a 503 may come back after the rows were written,
+# so only retry a 429 (rejected before execution)
+_APPEND_RETRY_STATUSES = (429,)
+
+def _sheets_retry(fn=None, *, statuses: Tuple[int, ...] = _RETRY_STATUSES):
+    """
+    Retry fn on Sheets 429/503 (or `statuses`): honor Retry-After, else
+    exponential backoff with jitter. Use bare or as @_sheets_retry(statuses=...).
+    """
+    if fn is None:
+        return functools.partial(_sheets_retry, statuses=statuses)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        for attempt in range(1, SHEETS_RETRY_ATTEMPTS + 1):
+            try:
+                return fn(*args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                resp = getattr(e, "response", None)
+                status = getattr(resp, "status_code", None)
+                if status not in statuses or attempt == SHEETS_RETRY_ATTEMPTS:
+                    raise
+                try:
+                    delay = float(resp.headers.get("Retry-After"))
+                except (TypeError, ValueError):
+                    delay = min(2 ** attempt, 32) + random.uniform(0, 1)
+                print(f"[SHEETS] {fn.__name__}: HTTP {status}, retry {attempt}/{SHEETS_RETRY_ATTEMPTS - 1} in {delay:.1f}s")
+                time.sleep(delay)
+    return wrapper
+
 # === Phones scraping helpers ===================================================
 
 def pick_top_n_for_phone_scrape(ctx: Dict[str, Any], top_n: int, only_missing: bool = True) -> List[Dict[str, Any]]:
@@ -107,50 +169,31 @@ def pick_top_n_for_phone_scrape(ctx: Dict[str, Any], top_n: int, only_missing: b
     if not url_col:
         print("[PHONES] No 'profile_url' column found; nothing to do.")
         return []
+    if top_n <= 0:
+        return []
 
-    # Compute A1 ranges for the first N data rows (rows start at 2)
-    end_row = 1 + max(0, int(top_n)) + 1  # include header row in range math; data starts at row 2
-    url_letter = rowcol_to_a1(1, url_col)[:-1]
-    url_range = f"{url_letter}2:{url_letter}{end_row}"
-
-    ranges = [url_range]
-    pid_values = None
-    phone_values = None
-
-    if pid_col:
-        pid_letter = rowcol_to_a1(1, pid_col)[:-1]
-        pid_range = f"{pid_letter}2:{pid_letter}{end_row}"
-        ranges.append(pid_range)
-    if phone_col:
-        phone_letter = rowcol_to_a1(1, phone_col)[:-1]
-        phone_range = f"{phone_letter}2:{phone_letter}{end_row}"
-        ranges.append(phone_range)
-
-    batches = ws.batch_get(ranges)  # 1 API read
-    # batches order aligns with 'ranges'
-    url_values = batches[0] if len(batches) >= 1 else []
-    if pid_col and len(batches) >= 2:
-        pid_values = batches[1]
-    if phone_col and ((pid_col and len(batches) >= 3) or (not pid_col and len(batches) >= 2)):
-        phone_values = batches[-1]
-
-    # Normalize lists: each is a list of 1-element rows or empty
-    def value_at(lst, idx):
+    # First N data rows (rows start at 2) of each column found via the header map:
+    # one batch_get, one range per column (no assumption about column order)
+    end_row = 1 + int(top_n)
+    cols = [c for c in (url_col, pid_col, phone_col) if c]
+    batches = ws.batch_get([f"{_col_letter(c)}2:{_col_letter(c)}{end_row}" for c in cols])
+    values_by_col = dict(zip(cols, batches))  # each: list of 1-element rows, blanks as []
+
+    def value_at(col, idx):
+        lst = values_by_col.get(col) if col else None
         if not lst or idx >= len(lst):
             return ""
         row = lst[idx] or []
-        return (row[0] if row else "").strip()
+        return str(row[0]).strip() if row else ""
 
     out: List[Dict[str, Any]] = []
-    for i in range(max(len(url_values), top_n)):
-        if i >= top_n:
-            break
+    for i in range(min(len(values_by_col.get(url_col) or []), top_n)):
         row_idx = 2 + i  # sheet row (header is row 1)
-        url = value_at(url_values, i)
+        url = value_at(url_col, i)
         if not url:
             continue
-        pid = value_at(pid_values, i) if pid_values is not None else ""
-        phone = value_at(phone_values, i) if phone_values is not None else ""
+        pid = value_at(pid_col, i)
+        phone = value_at(phone_col, i)
 
         if only_missing and phone:
             continue
@@ -165,6 +208,7 @@ def pick_top_n_for_phone_scrape(ctx: Dict[str, Any], top_n: int, only_missing: b
     return out
 
 
+@_sheets_retry
 def batch_update_phones(ctx: Dict[str, Any], updates: List[Dict[str, Any]]) -> int:
     """
     updates: list of {row_idx, phone}
@@ -181,16 +225,21 @@ def batch_update_phones(ctx: Dict[str, Any], updates: List[Dict[str, Any]]) -> i
         print("[PHONES] No 'phone' column found; cannot update.")
         return 0
 
-    phone_letter = rowcol_to_a1(1, phone_col)[:-1]
+    phone_letter = _col_letter(phone_col)
 
+    # Consecutive rows share one column range ("D5:D9") instead of one entry per cell
+    by_row = {int(u["row_idx"]): (u.get("phone") or "").strip() for u in updates}
     data = []
-    for u in updates:
-        r = int(u["row_idx"])
-        v = (u.get("phone") or "").strip()
-        data.append({
-            "range": f"{phone_letter}{r}",
-            "values": [[v]],
-        })
+    start, run = 0, []
+    for r in sorted(by_row):
+        if run and r != start + len(run):
+            data.append({"range": f"{phone_letter}{start}:{phone_letter}{start + len(run) - 1}", "values": run})
+            run = []
+        if not run:
+            start = r
+        run.append([by_row[r]])
+    if run:
+        data.append({"range": f"{phone_letter}{start}:{phone_letter}{start + len(run) - 1}", "values": run})
 
     # Batch write
     ws.batch_update(data)
@@ -212,29 +261,52 @@ def get_or_init_ctx(sa_json: str, spreadsheet_id: str) -> Dict[str, Any]:
     _SHEETS_CTX[key] = ctx
     return ctx
 
+# canon_pid: ASCII non-digits -> deleted (translate); other input goes through \D
+_ASCII_NON_DIGITS = {i: None for i in range(128) if not chr(i).isdigit()}
+_NON_DIGITS_RE = re.compile(r"\D+")
+
 def canon_pid(x) -> str:
     """
     Return a canonical profile_id as a *string*.
     - trims spaces
     - keeps digits only (Nashanyanya ids are numeric)
     """
-    s = str(x).strip()
-    s = re.sub(r"\D+", "", s)
-    return s
+    s = str(x)
+    if s.isascii():
+        return s.translate(_ASCII_NON_DIGITS)  # common case: no regex engine
+    return _NON_DIGITS_RE.sub("", s)
 
+@functools.lru_cache(maxsize=4096)  # same URL is canonicalized at scrape, row build and upsert
 def canon_url(u: str) -> str:
     """Normalize profile_url so we don't treat trailing slashes/params as different."""
     if not u:
         return ""
-    from urllib.parse import urlsplit, urlunsplit
     p = urlsplit(u)
     path = p.path.rstrip("/")  # drop trailing slash
     return urlunsplit((p.scheme, p.netloc, path, "", ""))  # strip query/frag
 
+@functools.lru_cache(maxsize=128)
 def _col_letter(col_idx: int) -> str:
-    # 1 -> "A", 27 -> "AA"
-    return "".join(ch for ch in rowcol_to_a1(1, col_idx) if ch.isalpha())
+    # 1 -> "A", 27 -> "AA" (bijective base 26)
+    s = ""
+    while col_idx:
+        col_idx, r = divmod(col_idx - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+# 1-based column -> letters for A..ZZ, indexed directly in per-cell hot loops
+_A1: Tuple[str, ...] = ("",) + tuple(_col_letter(i) for i in range(1, 703))
 
+def _header_index(header: List[str]) -> Dict[str, int]:
+    """Header text -> zero-based column (first occurrence wins, like list.index)."""
+    if header is NANNIES_HEADERS:
+        return _HEADER_INDEX
+    idx: Dict[str, int] = {}
+    for i, h in enumerate(header):
+        idx.setdefault(h, i)
+    return idx
+
+@_sheets_retry
 def sort_by_header(ws, header_name: str, desc: bool = True, header_row: int = 1) -> bool:
     """
     Sort rows (below the header) by a column identified by its header text.
@@ -246,10 +318,11 @@ def sort_by_header(ws, header_name: str, desc: bool = True, header_row: int = 1)
     header_row: row index of the header (1-based)
     """
     header = ws.row_values(header_row)
-    if header_name not in header:
+    col_idx0 = _header_index(header).get(header_name)
+    if col_idx0 is None:
         return False
 
-    col_idx = header.index(header_name) + 1
+    col_idx = col_idx0 + 1
     last_col_letter = _col_letter(len(header))
     rng = f"A{header_row + 1}:{last_col_letter}{ws.row_count}"  # keep header out of the sort
     order = "des" if desc else "asc"
@@ -257,112 +330,153 @@ def sort_by_header(ws, header_name: str, desc: bool = True, header_row: int = 1)
     return True
 
 
-def bold_columns_by_headers(ws, header_names: list[str] = None):
-    header = ws.row_values(1)
-    if not header_names:
-        return  # nothing to do
-    for name in header_names:
-        if name in header:
-            col_idx = header.index(name) + 1
-            col_letter = "".join(ch for ch in rowcol_to_a1(1, col_idx) if ch.isalpha())
-            ws.format(f"{col_letter}:{col_letter}", {"textFormat": {"bold": True}})
-
-def ensure_status_dropdown(ws):
-    try:
-        sheet_id = getattr(ws, "id", None) or ws._properties["sheetId"]
-        grid = ws._properties.get("gridProperties", {})
-        row_count = grid.get("rowCount", 5000)  # fallback if not present
-
-        # Which column to target
-        col_idx0 = NANNIES_HEADERS.index("status")  # zero-based
-        req = {
-            "setDataValidation": {
-                "range": {
-                    "sheetId": sheet_id,
-                    "startRowIndex": 1,           # skip header row
-                    "endRowIndex": row_count,
-                    "startColumnIndex": col_idx0,
-                    "endColumnIndex": col_idx0 + 1,
-                },
-                "rule": {
-                    "condition": {
-                        "type": "ONE_OF_LIST",
-                        "values": [{"userEnteredValue": s} for s in STATUSES_ALLOWED],
+# --- Formatting as batchUpdate request dicts (send many in one call) ---
+
+def _sheet_id(ws) -> int:
+    return getattr(ws, "id", None) or ws._properties["sheetId"]
+
+def _bold_columns_requests(ws, header_names: List[str], header: List[str]) -> List[dict]:
+    """repeatCell requests making whole columns bold, located by header text."""
+    sheet_id = _sheet_id(ws)
+    index = _header_index(header)
+    requests = []
+    for name in header_names or []:
+        col_idx0 = index.get(name)  # zero-based
+        if col_idx0 is not None:
+            requests.append({
+                "repeatCell": {
+                    "range": {
+                        "sheetId": sheet_id,
+                        "startColumnIndex": col_idx0,
+                        "endColumnIndex": col_idx0 + 1,
                     },
-                    "inputMessage": "Select a status",
-                    "strict": True,       # disallow values outside the list
-                    "showCustomUi": True, # show dropdown arrow
+                    "cell": {"userEnteredFormat": {"textFormat": {"bold": True}}},
+                    "fields": "userEnteredFormat.textFormat.bold",
+                }
+            })
+    return requests
+
+def _status_dropdown_request(ws, end_row: Optional[int] = None) -> dict:
+    sheet_id = _sheet_id(ws)
+    grid = ws._properties.get("gridProperties", {})
+    row_count = grid.get("rowCount", 5000)  # fallback if not present
+    if end_row is not None:
+        row_count = min(row_count, end_row)
+
+    # Which column to target
+    col_idx0 = _HEADER_INDEX["status"]  # zero-based
+    return {
+        "setDataValidation": {
+            "range": {
+                "sheetId": sheet_id,
+                "startRowIndex": 1,           # skip header row
+                "endRowIndex": row_count,
+                "startColumnIndex": col_idx0,
+                "endColumnIndex": col_idx0 + 1,
+            },
+            "rule": {
+                "condition": {
+                    "type": "ONE_OF_LIST",
+                    "values": [{"userEnteredValue": s} for s in STATUSES_ALLOWED],
                 },
-            }
+                "inputMessage": "Select a status",
+                "strict": True,       # disallow values outside the list
+                "showCustomUi": True, # show dropdown arrow
+            },
         }
+    }
 
-        ws.spreadsheet.batch_update({"requests": [req]})
-    except Exception as e:
-        print(f"[SHEETS] Could not set status dropdown: {e}")
-
+def _hide_columns_requests(ws, headers_to_hide) -> List[dict]:
+    sheet_id = _sheet_id(ws)
+    requests = []
+    for header in headers_to_hide:
+        col_idx = _HEADER_INDEX.get(header)  # zero-based
+        if col_idx is not None:
+            requests.append({
+                "updateDimensionProperties": {
+                    "range": {
+                        "sheetId": sheet_id,
+                        "dimension": "COLUMNS",
+                        "startIndex": col_idx,
+                        "endIndex": col_idx + 1,
+                    },
+                    "properties": {"hiddenByUser": True},
+                    "fields": "hiddenByUser",
+                }
+            })
+    return requests
+
+def _freeze_header_request(ws) -> dict:
+    return {
+        "updateSheetProperties": {
+            "properties": {"sheetId": _sheet_id(ws), "gridProperties": {"frozenRowCount": 1}},
+            "fields": "gridProperties.frozenRowCount",
+        }
+    }
 
-def hide_columns(ws, headers_to_hide):
+def _column_colors_requests(ws, header: List[str], end_row: int = 1000) -> List[dict]:
     """
-    Hide columns by header name using gspread's batch_update (no googleapiclient).
+    repeatCell requests coloring machine columns gray and user columns white
+    (rows 2–end_row), one request per contiguous block of columns.
     """
-    try:
-        sheet_id = getattr(ws, "id", None) or ws._properties["sheetId"]
-
-        requests = []
-        for header in headers_to_hide:
-            if header in NANNIES_HEADERS:
-                col_idx = NANNIES_HEADERS.index(header)  # zero-based
-                requests.append({
-                    "updateDimensionProperties": {
-                        "range": {
-                            "sheetId": sheet_id,
-                            "dimension": "COLUMNS",
-                            "startIndex": col_idx,
-                            "endIndex": col_idx + 1,
-                        },
-                        "properties": {"hiddenByUser": True},
-                        "fields": "hiddenByUser",
-                    }
-                })
-
-        if requests:
-            ws.spreadsheet.batch_update({"requests": requests})
-    except Exception as e:
-        print(f"[SHEETS] Could not hide columns: {e}")
+    sheet_id = _sheet_id(ws)
+    gray = {"red": 0.9, "green": 0.9, "blue": 0.9}  # light gray
+    white = {"red": 1, "green": 1, "blue": 1}
+
+    requests = []
+    for names, rgb in ((set(MACHINE_NANNIES_HEADERS), gray), (set(HUMAN_NANNIES_HEADERS), white)):
+        idxs = [i for i, h in enumerate(header) if h in names]  # zero-based
+        blocks: List[List[int]] = []
+        for i in idxs:
+            if blocks and blocks[-1][1] == i:
+                blocks[-1][1] = i + 1
+            else:
+                blocks.append([i, i + 1])
+        for start, end in blocks:
+            requests.append({
+                "repeatCell": {
+                    "range": {
+                        "sheetId": sheet_id,
+                        "startRowIndex": 1,
+                        "endRowIndex": end_row,
+                        "startColumnIndex": start,
+                        "endColumnIndex": end,
+                    },
+                    "cell": {"userEnteredFormat": {"backgroundColor": rgb}},
+                    "fields": "userEnteredFormat.backgroundColor",
+                }
+            })
+    return requests
 
-def apply_column_colors(sheet):
+def apply_initial_formatting(ws, data_rows: Optional[int] = None) -> None:
     """
-    Color-code columns so that machine-populated ones are gray
-    and user-populated ones stay white.
+    Nannies sheet setup in ONE batchUpdate, sent on every load_existing_ids: hide
+    some columns, status dropdown, bold score, frozen header row, column colors.
+    Assumes the header row already matches NANNIES_HEADERS. With data_rows,
+    the dropdown/colors cover only those rows plus FORMAT_ROW_HEADROOM.
     """
-    # Define which columns are machine vs user
-    machine_set =  set(MACHINE_NANNIES_HEADERS)
-    user_set = set(HUMAN_NANNIES_HEADERS)
-
-    # Read header row
-    header = sheet.row_values(1)
-
-    # Find column indexes (1-based for Google Sheets API)
-    machine_indexes = [i+1 for i, h in enumerate(header) if h in machine_set]
-    user_indexes = [i+1 for i, h in enumerate(header) if h in user_set]
-
-    # Define colors
-    gray_format = cellFormat(backgroundColor=color(0.9, 0.9, 0.9))  # light gray
-    white_format = cellFormat(backgroundColor=color(1, 1, 1))       # white
-
-    # Apply colors (rows 2–1000, change range if needed)
-    for col in machine_indexes:
-        col_letter = chr(64+col)  # 1->A, 2->B...
-        format_cell_range(sheet, f"{col_letter}2:{col_letter}1000", gray_format)
-
-    for col in user_indexes:
-        col_letter = chr(64+col)
-        format_cell_range(sheet, f"{col_letter}2:{col_letter}1000", white_format)
+    grid_rows = ws._properties.get("gridProperties", {}).get("rowCount", 5000)
+    end_row = grid_rows if data_rows is None else min(grid_rows, 1 + data_rows + FORMAT_ROW_HEADROOM)
+    try:
+        ws.spreadsheet.batch_update({"requests": [
+            *_hide_columns_requests(ws, ["last_active_raw", "last_active_at", "first_seen_at", "last_seen_at"]),
+            _status_dropdown_request(ws, end_row),
+            *_bold_columns_requests(ws, ["score"], NANNIES_HEADERS),  # adjust to your exact header text
+            _freeze_header_request(ws),
+            # colors ride along every time so their range grows with the data
+            *_column_colors_requests(ws, NANNIES_HEADERS, end_row),
+        ]})
+    except Exception as e:
+        print(f"[SHEETS] Could not format sheet: {e}")
 
 
+# Client / spreadsheet / worksheet handles are memoized per process: each costs
+# an auth or metadata round-trip, and upsert + run logging open the same sheet.
+@functools.lru_cache(maxsize=4)
 def _client(sa_json: str) -> gspread.Client:
     return gspread.service_account(filename=sa_json)
 
+@functools.lru_cache(maxsize=4)
 def _open_sheet(sa_json: str, spreadsheet_id: str) -> gspread.Spreadsheet:
     gc = _client(sa_json)
     return gc.open_by_key(spreadsheet_id)
@@ -373,16 +487,40 @@ def _get_or_create_ws(sh: gspread.Spreadsheet, title: str) -> gspread.Worksheet:
     except gspread.WorksheetNotFound:
         return sh.add_worksheet(title=title, rows=1000, cols=40)
 
-def _ensure_headers(ws: gspread.Worksheet, headers: List[str]) -> Dict[str, int]:
-    """Ensure first row == headers; return {col_name: 1-based index}."""
-    existing = ws.row_values(1)
+@functools.lru_cache(maxsize=8)
+def _get_or_create_ws_cached(sa_json: str, spreadsheet_id: str, title: str) -> gspread.Worksheet:
+    return _get_or_create_ws(_open_sheet(sa_json, spreadsheet_id), title)
+
+def invalidate_sheet_cache() -> None:
+    """Forget cached clients/worksheets/contexts (e.g. after tabs were renamed or recreated)."""
+    _get_or_create_ws_cached.cache_clear()
+    _open_sheet.cache_clear()
+    _client.cache_clear()
+    _SHEETS_CTX.clear()
+    _RUNS_HEADERS_OK.clear()
+
+def _ensure_headers(
+    ws: gspread.Worksheet,
+    headers: List[str],
+    existing: Optional[List[str]] = None,
+    *,
+    freeze: bool = True,
+) -> Dict[str, int]:
+    """
+    Ensure first row == headers; return {col_name: 1-based index}.
+    Pass `existing` if row 1 was already read (saves an API call), and
+    freeze=False if the caller batches the header freeze itself.
+    """
+    if existing is None:
+        existing = ws.row_values(1)
     if existing != headers:
         # set the header row exactly
         ws.update("A1", [headers])
-        try:
-            ws.freeze(rows=1)
-        except Exception:
-            pass
+        if freeze:
+            try:
+                ws.freeze(rows=1)
+            except Exception:
+                pass
     return {name: i + 1 for i, name in enumerate(headers)}
 
 # ------------------------- Read existing IDs -------------------------
@@ -393,73 +531,73 @@ def load_existing_ids(sa_json: str, spreadsheet_id: str):
     id_to_row: profile_id -> row index (2-based)
     existing_urls_by_id: profile_id -> profile_url (if present)
     """
-    sh = _open_sheet(sa_json, spreadsheet_id)
-    ws = _get_or_create_ws(sh, NANNIES_SHEET)
-    header_map = _ensure_headers(ws, NANNIES_HEADERS)
-
-    #Formatting the sheet: hide some columns, ensure dropdown
-    hide_columns(ws, ["last_active_raw", "last_active_at", "first_seen_at", "last_seen_at"])
-    # after you ensure headers / open ws
-    ensure_status_dropdown(ws)
-    bold_columns_by_headers(ws, ["score"])  # adjust to your exact header text
-
-    # === FAST COLUMN READS: 1–2 API calls instead of per-row ===
-    id_to_row: Dict[str, int] = {}
-    existing_urls_by_id: Dict[str, str] = {}
-
-    pid_col = header_map.get("profile_id")
-    url_col = header_map.get("profile_url")
-
-    # Nothing to map if we don't have a profile_id column
-    if pid_col is None:
-        return ws, header_map, id_to_row, existing_urls_by_id
-
-    # Read entire columns once (each is a single API read). First element is header.
-    pid_values: List[str] = ws.col_values(pid_col) if pid_col else []
-    url_values: List[str] = ws.col_values(url_col) if url_col else []
-
-    # Drop header row (row 1)
-    if pid_values:
-        pid_values = pid_values[1:]
-    if url_values:
-        url_values = url_values[1:]
+    ws = _get_or_create_ws_cached(sa_json, spreadsheet_id, NANNIES_SHEET)
+
+    # === ONE API READ: header row + profile_id + profile_url columns ===
+    # Column positions are fixed by NANNIES_HEADERS (row 1 is rewritten to match),
+    # so the data ranges can be requested together with the header row.
+    pid_letter = _col_letter(_HEADER_INDEX[PID_FIELD] + 1)
+    url_letter = _col_letter(_HEADER_INDEX[URL_FIELD] + 1)
+    # COLUMNS major dimension: each column comes back as one flat list instead of
+    # one single-cell list per row, a much smaller response for long sheets.
+    header_vr, pid_vr, url_vr = ws.batch_get(
+        ["1:1", f"{pid_letter}2:{pid_letter}", f"{url_letter}2:{url_letter}"],
+        major_dimension="COLUMNS",
+    )
+    # header row transposed: one [value] per column, [] for a blank cell
+    existing_header = [col[0] if col else "" for col in header_vr]
+    pid_col = pid_vr[0] if pid_vr else []
+    url_col = url_vr[0] if url_vr else []
+    header_map = _ensure_headers(ws, NANNIES_HEADERS, existing=existing_header, freeze=False)
+    apply_initial_formatting(ws, data_rows=len(pid_col))
+
+    # Columns start at row 2; blank cells come back as "", trailing blanks are trimmed.
+    # Canonical ids, with URLs padded to the same length (no per-row bounds checks)
+    pids = [canon_pid(v) for v in pid_col]
+    urls = itertools.chain(url_col, itertools.repeat(""))
 
     # Build maps. Spreadsheet row index starts at 2 here.
-    for i, pid_cell in enumerate(pid_values, start=2):
-        if not pid_cell:
-            continue
-        pid = canon_pid(pid_cell)
-        if not pid:
-            continue
-
-        id_to_row[p_id] = i if (p_id := pid) else i  # keep exact row index
-
-        # Attach canonical URL if available at same offset
-        if url_values:
-            j = i - 2
-            if 0 <= j < len(url_values):
-                u = url_values[j] or ""
-                if u:
-                    existing_urls_by_id[p_id] = canon_url(u)
-
+    id_to_row: Dict[str, int] = {pid: i for i, pid in enumerate(pids, start=2) if pid}
+    existing_urls_by_id: Dict[str, str] = {
+        pid: canon_url(u) for pid, u in zip(pids, urls) if pid and u
+    }
     return ws, header_map, id_to_row, existing_urls_by_id
 
 
 # ------------------------- Append NEW rows -------------------------
 
-def append_new_rows(ws: gspread.Worksheet, header_map: Dict[str, int], rows: List[dict]) -> int:
-    """Append brand-new rows to the bottom. rows must already have keys matching NANNIES_HEADERS."""
+_UPDATED_RANGE_ROW_RE = re.compile(r"![A-Z]+(\d+)")
+
+@_sheets_retry(statuses=_APPEND_RETRY_STATUSES)
+def append_new_rows(
+    ws: gspread.Worksheet,
+    header_map: Dict[str, int],
+    rows: List[dict],
+    id_to_row: Optional[Dict[str, int]] = None,
+) -> int:
+    """
+    Append brand-new rows to the bottom. rows must already have keys matching NANNIES_HEADERS.
+    With id_to_row, the appended rows' positions (from the API's updatedRange) are recorded in it.
+    """
     if not rows:
         return 0
-    payload = []
-    for r in rows:
-        payload.append([r.get(h, "") for h in NANNIES_HEADERS])
+    payload = [list(_GETTER({**_DEFAULTS, **r})) for r in rows]
     # USER_ENTERED allows date-like strings to be displayed nicely
-    ws.append_rows(payload, value_input_option="USER_ENTERED")
+    resp = ws.append_rows(payload, value_input_option="USER_ENTERED")
+    if id_to_row is not None:
+        try:
+            m = _UPDATED_RANGE_ROW_RE.search(resp["updates"]["updatedRange"])
+        except (KeyError, TypeError):
+            m = None
+        if m:
+            first = int(m.group(1))
+            for i, r in enumerate(rows):
+                id_to_row[r[PID_FIELD]] = first + i
     return len(rows)
 
 # ------------------------- Update EXISTING rows (partial) -------------------------
 
+@_sheets_retry
 def batch_update_machine_fields(
     ws: gspread.Worksheet,
     header_map: Dict[str, int],
@@ -471,145 +609,291 @@ def batch_update_machine_fields(
     """
     if not updates:
         return 0
-    cells: List[Cell] = []
+    # Columns in sheet order, so adjacent ones (score..last_active_at) form one range
+    cols = sorted((header_map[c], c) for c in _MACHINE_TUPLE if c in header_map)
+    data: List[dict] = []
     rows_touched = 0
 
-    for row_idx, data in updates.items():
+    def flush(row_idx: int, start: int, values: List[Any]) -> None:
+        if values:
+            rng = f"{_A1[start]}{row_idx}:{_A1[start + len(values) - 1]}{row_idx}"
+            data.append({"range": rng, "values": [values]})
+
+    for row_idx, row in updates.items():
+        start, run = 0, []
         touched_this_row = False
-        for col_name in MACHINE_UPDATE_COLS:
-            if col_name not in header_map:
-                continue
-            if col_name not in data:
+        for col_idx, col_name in cols:
+            if col_name not in row:
                 continue
-            col_idx = header_map[col_name]
-            val = data[col_name]
-            if val is None:
-                val = ""
-            cells.append(Cell(row=row_idx, col=col_idx, value=str(val)))
             touched_this_row = True
+            if run and col_idx != start + len(run):  # gap: close the current range
+                flush(row_idx, start, run)
+                run = []
+            if not run:
+                start = col_idx
+            val = row[col_name]
+            # native JSON numbers/strings; USER_ENTERED types them server-side
+            run.append("" if val is None else val if isinstance(val, _JSON_SCALARS) else str(val))
+        flush(row_idx, start, run)
         if touched_this_row:
             rows_touched += 1
 
-    if cells:
-        ws.update_cells(cells, value_input_option="USER_ENTERED")
+    # One call per <= MAX_CELLS_PER_BATCH cells
+    chunk: List[dict] = []
+    n_cells = 0
+    for item in data:
+        size = len(item["values"][0])
+        if chunk and n_cells + size > MAX_CELLS_PER_BATCH:
+            ws.batch_update(chunk, value_input_option="USER_ENTERED")
+            chunk, n_cells = [], 0
+        chunk.append(item)
+        n_cells += size
+    if chunk:
+        ws.batch_update(chunk, value_input_option="USER_ENTERED")
     return rows_touched
 
 # ------------------------- Runs sheet -------------------------
 
+RUNS_HEADERS: List[str] = [
+    "run_id_iso",
+    "serp_url",
+    "cutoff_hours",
+    "pages_scanned",
+    "candidates_scanned",
+    "new_inserted",
+    "updated_existing",
+    "duration_sec",
+]
+
+# Audit rows waiting to be written, per (sa_json, spreadsheet_id); flushed with
+# one append_rows when full or at process exit
+RUN_BUFFER_MAX = 20
+_RUN_BUFFER: Dict[Tuple[str, str], List[list]] = {}
+# Runs sheets whose header row was already checked this process
+_RUNS_HEADERS_OK: set = set()
+
 def append_run_row(sa_json: str, spreadsheet_id: str, run_info: dict) -> None:
-    """Append a single audit row to the 'Runs' sheet."""
-    sh = _open_sheet(sa_json, spreadsheet_id)
-    ws = _get_or_create_ws(sh, RUNS_SHEET)
-
-    headers = [
-        "run_id_iso",
-        "serp_url",
-        "cutoff_hours",
-        "pages_scanned",
-        "candidates_scanned",
-        "new_inserted",
-        "updated_existing",
-        "duration_sec",
-    ]
-    _ensure_headers(ws, headers)
-    ws.append_row(
-        [run_info.get(h, "") for h in headers],
-        value_input_option="USER_ENTERED",
-    )
+    """Queue a single audit row for the 'Runs' sheet (see flush_run_rows)."""
+    rows = _RUN_BUFFER.setdefault((sa_json, spreadsheet_id), [])
+    rows.append([run_info.get(h, "") for h in RUNS_HEADERS])
+    if len(rows) >= RUN_BUFFER_MAX:
+        flush_run_rows(sa_json, spreadsheet_id)
+
+def flush_run_rows(sa_json: Optional[str] = None, spreadsheet_id: Optional[str] = None) -> int:
+    """
+    Write buffered audit rows (all sheets, or just the given one) with one
+    append_rows per sheet. Callers should flush at the end of a run; the
+    atexit hook is only a backstop. Returns rows written.
+    """
+    keys = [(sa_json, spreadsheet_id)] if sa_json and spreadsheet_id else list(_RUN_BUFFER)
+    written = 0
+    for key in keys:
+        rows = _RUN_BUFFER.pop(key, None)
+        if not rows:
+            continue
+        try:
+            ws = _get_or_create_ws_cached(key[0], key[1], RUNS_SHEET)
+            if key not in _RUNS_HEADERS_OK:
+                _ensure_headers(ws, RUNS_HEADERS)
+                _RUNS_HEADERS_OK.add(key)
+            _sheets_retry(ws.append_rows, statuses=_APPEND_RETRY_STATUSES)(
+                rows, value_input_option="USER_ENTERED"
+            )
+            written += len(rows)
+        except Exception as e:
+            print(f"[WARN] could not append {len(rows)} Runs row(s): {e}")
+    return written
+
+atexit.register(flush_run_rows)
 
 # ------------------------- Coordinated UPSERT -------------------------
 
-def upsert_nannies(
-    sa_json: str,
-    spreadsheet_id: str,
+def _partition(
     scraped_rows: List[dict],
-    *,
-    new_only: bool = False,
-    ctx: Optional[dict] = None,   # <— NEW
-):
-    if ctx is None:
-        ws, header_map, id_to_row, existing_urls_by_id = load_existing_ids(sa_json, spreadsheet_id)
-    else:
-        ws = ctx["ws"]
-        header_map = ctx["header_map"]
-        id_to_row = ctx["id_to_row"]
-        existing_urls_by_id = ctx["existing_urls_by_id"]
-
+    id_to_row: Dict[str, int],
+    existing_urls_by_id: Dict[str, str],
+    now_iso: str,
+    new_only: bool,
+) -> Tuple[List[dict], Dict[int, dict]]:
+    """
+    Single pass over scraped rows: canonicalize pid/url (in place), then split
+    into rows to insert and row_index -> partial update for existing pids.
+    A pid seen twice in the batch (e.g. on two SERP pages) counts once: first wins.
+    Hot lookups are bound to locals since this runs once per scraped row.
+    """
     to_insert: List[dict] = []
     to_update_by_row: Dict[int, dict] = {}
-    now_iso = dt.datetime.now().astimezone().isoformat(timespec="seconds")
+    insert_append = to_insert.append
+    seen: set = set()
+    seen_add = seen.add
+    update_set = to_update_by_row.__setitem__
+    id_to_row_get = id_to_row.get
+    sheet_url_get = existing_urls_by_id.get
+    static_defaults = _STATIC_DEFAULTS
+    time_defaults = {"first_seen_at": now_iso, "last_seen_at": now_iso}
+    # profile_url is written only when it differs from the sheet (below)
+    machine_cols = tuple(c for c in _MACHINE_TUPLE if c != URL_FIELD)
+    _canon_pid, _canon_url = canon_pid, canon_url
+    pid_field, url_field = PID_FIELD, URL_FIELD
 
     for r in scraped_rows:
-        # === INSIDE for r in scraped_rows: canonicalize first ===
-        pid_raw = r.get(PID_FIELD) or r.get("id") or r.get("profileId")
-        pid = canon_pid(pid_raw or "")
+        # === canonicalize first ===
+        pid_raw = r.get(pid_field) or r.get("id") or r.get("profileId")
+        pid = _canon_pid(pid_raw or "")
         if not pid:
             continue  # skip rows without a valid id
 
         # normalize url -> profile_url
-        if r.get(URL_FIELD):
-            r[URL_FIELD] = canon_url(r[URL_FIELD])
+        if r.get(url_field):
+            r[url_field] = _canon_url(r[url_field])
         elif r.get("url"):
-            r[URL_FIELD] = canon_url(r["url"])
+            r[url_field] = _canon_url(r["url"])
 
         # ensure we always store pid as *string*
-        r[PID_FIELD] = pid
+        r[pid_field] = pid
 
-        # normalize url -> profile_url
-        r.setdefault("profile_url", r.get("url", ""))
+        if pid in seen:
+            continue  # duplicate within this batch
+        seen_add(pid)
 
-        # defaults for NEW rows
-        r.setdefault("first_seen_at", now_iso)
-        r.setdefault("last_seen_at", now_iso)
-        r.setdefault("status", "Новый")
-        r.setdefault("notes", "")
-        r.setdefault("last_contacted_at", "")
+        # defaults for NEW rows (and profile_url), filled by one dict merge;
+        # keys already present in r win
+        r = {**static_defaults, **time_defaults, **r}
 
-        if pid not in id_to_row:
-            to_insert.append(r)
+        # === INSERT/UPDATE decision strictly by pid ===
+        row_idx = id_to_row_get(pid)
+        if row_idx is None:
+            insert_append(r)
             continue
+        if new_only or row_idx < 2:
+            continue  # row_idx -1: already in the sheet, position not known yet
 
-        if new_only:
-            continue
+        # Update machine fields you expect to change
+        upd: Dict[str, Optional[str]] = {k: r[k] for k in machine_cols if k in r}
 
-        # === INSERT/UPDATE decision strictly by pid ===
-        row_idx = id_to_row.get(pid)
-        if row_idx is None:
-            # build minimal new row (respect your header_map)
-            to_insert.append(r)
-        else:
-            upd: Dict[str, Optional[str]] = {}
+        # backfill/normalize profile_url only if blank in sheet or changed after canon
+        url = r.get(url_field)
+        if url and sheet_url_get(pid, "") != url:
+            upd[url_field] = url
 
-            # Update machine fields you expect to change
-            for k in MACHINE_UPDATE_COLS:
-                if k in r:
-                    upd[k] = r[k]
+        update_set(row_idx, upd)
 
-            # backfill/normalize profile_url only if blank in sheet or changed after canon
-            if r.get(URL_FIELD):
-                sheet_url = existing_urls_by_id.get(pid, "")
-                if not sheet_url or sheet_url != r[URL_FIELD]:
-                    upd[URL_FIELD] = r[URL_FIELD]
+    return to_insert, to_update_by_row
 
-            to_update_by_row[row_idx] = upd
+def _score_text(v: Any) -> str:
+    return str(v).strip().replace(",", ".")
 
-    new_count = append_new_rows(ws, header_map, to_insert)
+def _scores_changed(ctx: Dict[str, Any], to_update_by_row: Dict[int, dict]) -> bool:
+    """
+    True if some update writes a score that differs from the sheet's. The sheet's
+    scores are read once per ctx (profile_id + score columns, one batch_get) and
+    kept current with what we write, so later pages cost no read.
+    """
+    score_rows = {row: u["score"] for row, u in to_update_by_row.items() if "score" in u}
+    if not score_rows:
+        return False
+    known = ctx.get("score_by_id")
+    if known is None:
+        pid_letter = _col_letter(_HEADER_INDEX[PID_FIELD] + 1)
+        score_letter = _col_letter(_HEADER_INDEX["score"] + 1)
+        pid_vr, score_vr = ctx["ws"].batch_get(
+            [f"{pid_letter}2:{pid_letter}", f"{score_letter}2:{score_letter}"],
+            major_dimension="COLUMNS",
+        )
+        pids = pid_vr[0] if pid_vr else []
+        scores = itertools.chain(score_vr[0] if score_vr else [], itertools.repeat(""))
+        known = ctx["score_by_id"] = {
+            canon_pid(p): _score_text(v) for p, v in zip(pids, scores) if canon_pid(p)
+        }
+    row_to_pid = {row: pid for pid, row in ctx["id_to_row"].items()}
+    changed = False
+    for row, score in score_rows.items():
+        new = _score_text(score)
+        pid = row_to_pid.get(row)
+        if pid is None or known.get(pid) != new:
+            changed = True  # unknown row: assume it moved
+        if pid is not None:
+            known[pid] = new
+    return changed
+
+def flush_pending_sort(ctx: Dict[str, Any]) -> bool:
+    """
+    Sort the sheet by score (desc) if an upsert_nannies(final=False) deferred it.
+    Call after the last page of a run. Returns True if a sort was sent.
+    """
+    if not ctx.get("sort_pending"):
+        return False
+    ws = ctx["ws"]
+    sorted_ok = sort_by_header(ws, "score", desc=True)
+    ctx["sort_pending"] = False
+    if sorted_ok:
+        _reload_id_to_row(ctx)
+    return sorted_ok
+
+def _reload_id_to_row(ctx: Dict[str, Any]) -> None:
+    """
+    Re-read the profile_id column into ctx["id_to_row"] (in place: callers and
+    _SHEETS_CTX share the dict). Needed after every server-side sort, which
+    moves rows under the cached indices. URLs are keyed by pid and stay valid.
+    """
+    letter = _col_letter(_HEADER_INDEX[PID_FIELD] + 1)
+    try:
+        pid_vr = ctx["ws"].get(f"{letter}2:{letter}", major_dimension="COLUMNS")
+    except Exception:
+        # stale row indices must never be reused: make the next get_or_init_ctx reload
+        for key in [k for k, v in _SHEETS_CTX.items() if v is ctx]:
+            del _SHEETS_CTX[key]
+        raise
+    pids = (canon_pid(v) for v in (pid_vr[0] if pid_vr else []))
+    id_to_row = ctx["id_to_row"]
+    id_to_row.clear()
+    id_to_row.update((pid, i) for i, pid in enumerate(pids, start=2) if pid)
+
+def upsert_nannies(
+    sa_json: str,
+    spreadsheet_id: str,
+    scraped_rows: List[dict],
+    *,
+    new_only: bool = False,
+    ctx: Optional[dict] = None,   # <— NEW
+    final: bool = True,           # False: defer the score sort (see flush_pending_sort)
+):
+    if ctx is None:
+        # per-process context: later upserts in the same run reuse the id map
+        # (re-read after every sort) instead of re-reading the profile_id column
+        ctx = get_or_init_ctx(sa_json, spreadsheet_id)
+    ws = ctx["ws"]
+    header_map = ctx["header_map"]
+    id_to_row = ctx["id_to_row"]
+    existing_urls_by_id = ctx["existing_urls_by_id"]
+
+    now_iso = dt.datetime.now().astimezone().isoformat(timespec="seconds")
+    to_insert, to_update_by_row = _partition(
+        scraped_rows, id_to_row, existing_urls_by_id, now_iso, new_only
+    )
+
+    # compared before the write below, while the sheet still holds the old scores
+    scores_changed = not new_only and _scores_changed(ctx, to_update_by_row)
     upd_count = 0 if new_only else batch_update_machine_fields(ws, header_map, to_update_by_row)
-    apply_column_colors(ws)
-    # sort by score descending
-    sort_by_header(ws, "score", desc=True)
+    new_count = append_new_rows(ws, header_map, to_insert, id_to_row)
+    # sort by score descending, once per run rather than once per page, and only
+    # if rows were appended or some update changed a score. The server-side
+    # sort moves formatting/notes with the rows.
+    if new_count or (upd_count and scores_changed):
+        ctx["sort_pending"] = True
+    if final:
+        flush_pending_sort(ctx)
 
     # Keep in-memory maps in sync for this process (prevents re-adding within the run)
-    if ctx is not None:
-        for r in scraped_rows or []:
-            pid = canon_pid(r.get("profile_id") or "")
-            if not pid:
-                continue
-            if pid not in id_to_row:
-                id_to_row[pid] = id_to_row.get(pid, -1)
-            u = r.get("profile_url")
-            if u:
-                existing_urls_by_id[pid] = u
+    for r in scraped_rows or []:
+        pid = canon_pid(r.get("profile_id") or "")
+        if not pid:
+            continue
+        if pid not in id_to_row:
+            id_to_row[pid] = id_to_row.get(pid, -1)
+        u = r.get("profile_url")
+        if u:
+            existing_urls_by_id[pid] = u
 
     return new_count, upd_count
 
@@ -1,18 +1,70 @@
 # io_csv.py
 from pathlib import Path
+import atexit
 import csv
 from typing import Dict
 
+FLUSH_EVERY = 256  # rows buffered between explicit flushes
+
+class CsvAppender:
+    """
+    Keeps one CSV file open for appending (opened lazily, closed at exit),
+    instead of an open/close pair per row.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._f = None
+        self._writer = None
+        self._needs_header = False
+        self._pending = 0
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._needs_header = not self.path.exists()
+        self._f = open(self.path, "a", newline="", encoding="utf-8", buffering=1 << 16)
+        self._writer = csv.writer(self._f)
+
+    def write(self, row: Dict):
+        if self._f is None:
+            self._open()
+        if self._needs_header:
+            self._writer.writerow(row.keys())
+            self._needs_header = False
+        # same output as DictWriter(fieldnames=list(row.keys())).writerow(row)
+        self._writer.writerow(row.values())
+        self._pending += 1
+        if self._pending >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if self._f is not None:
+            self._f.flush()
+        self._pending = 0
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            self._writer = None
+        self._pending = 0
+
+_APPENDERS: Dict[Path, CsvAppender] = {}
+
 def append_row(row: Dict, path: Path):
     """
     Append a single dict row to CSV, creating file with headers if needed.
     Headers are taken from the row's keys (keep them stable across writes).
     """
-    path.parent.mkdir(parents=True, exist_ok=True)
-    file_exists = path.exists()
-
-    with open(path, "a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=list(row.keys()))
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(row)
+    appender = _APPENDERS.get(path)
+    if appender is None:
+        appender = _APPENDERS[path] = CsvAppender(path)
+    appender.write(row)
+
+def close_all():
+    """Flush and close every open CSV appender (runs automatically at exit)."""
+    for appender in _APPENDERS.values():
+        appender.close()
+    _APPENDERS.clear()
+
+atexit.register(close_all)
@@ -18,14 +18,27 @@ console = Console()
 import re
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 
+# Placeholder/label texts of the login form fields (compiled once)
+_EMAIL_PLACEHOLDER_RE = re.compile(r"e-?mail|email|почта", re.I)
+_EMAIL_LABEL_RE = re.compile(r"e-?mail|email|почта|электрон", re.I)
+_PASSWORD_RE = re.compile(r"парол", re.I)  # "пароль"
+
 def first_visible(page, candidates, timeout=8000):
+    """
+    Wait (once, up to `timeout`) for any candidate to become visible, then
+    return the first visible one in priority order.
+    """
+    combined = candidates[0]
+    for loc in candidates[1:]:
+        combined = combined.or_(loc)
+    try:
+        combined.first.wait_for(state="visible", timeout=timeout)
+    except PlaywrightTimeoutError:
+        raise PlaywrightTimeoutError("No candidate locator became visible in time.")
     for loc in candidates:
-        try:
-            loc.wait_for(state="visible", timeout=timeout)
+        if loc.first.is_visible():
             return loc
-        except PlaywrightTimeoutError:
-            continue
-    raise PlaywrightTimeoutError("No candidate locator became visible in time.")
+    return combined.first  # became hidden again in between; let the caller's action wait
 
 # 👉 Replace these with actual selectors from the site (use Chrome DevTools → Copy selector)
 SELECTORS = {
@@ -102,8 +115,8 @@ def main():
 
         # Try robust username/email locators
         email_candidates = [
-            page.get_by_placeholder(re.compile(r"e-?mail|email|почта", re.I)),
-            page.get_by_label(re.compile(r"e-?mail|email|почта|электрон", re.I)),
+            page.get_by_placeholder(_EMAIL_PLACEHOLDER_RE),
+            page.get_by_label(_EMAIL_LABEL_RE),
             page.locator('input[type="email"]'),
             page.locator('input[name="email"]'),
             page.locator('input[name*="email" i]'),
@@ -114,8 +127,8 @@ def main():
 
         # Try robust password locators
         pwd_candidates = [
-            page.get_by_placeholder(re.compile(r"парол", re.I)),   # "пароль"
-            page.get_by_label(re.compile(r"парол", re.I)),
+            page.get_by_placeholder(_PASSWORD_RE),
+            page.get_by_label(_PASSWORD_RE),
             page.locator('input[type="password"]'),
             page.locator('input[name*="pass" i]'),
         ]
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import time
+import random
 import argparse
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 from typing import Any, Iterable, Optional 
 from pathlib import Path
@@ -14,10 +17,12 @@ import re
 from gsheets import (
     upsert_nannies,
     append_run_row,
+    flush_run_rows,
     load_existing_ids,
     canon_url,
     canon_pid,
     get_or_init_ctx,           
+    flush_pending_sort,
     pick_top_n_for_phone_scrape,  
     batch_update_phones,          
 )
@@ -27,21 +32,16 @@ import os
 from extractors import (
     get_serp_cards,
     open_profile_from_card,
-    card_primary_url,
     go_to_next_serp_page, 
     # existing field extractors:
-    extract_name_from_profile, 
-    extract_age_from_profile,
-    extract_experience_from_profile,
-    extract_about_from_profile, 
-    extract_education_from_profile,
-    extract_recommendations_from_profile,
-    extract_has_audio_from_profile,
-    extract_has_fairy_tale_audio,
-    extract_last_active_from_card,
-    extract_location_from_profile,
+    extract_all_fields,
+    extract_serp_rows,
     extract_travel_time_via_yandex,
     extract_phone_number,
+    extract_profiles_batch,
+    ProfileBatchPool,
+    new_light_context,
+    ProfileContext,
 )
 
 # Reuse session saved by nash_login.py
@@ -55,7 +55,10 @@ OUTPUT_CSV = Path("data/nannies.csv")
 
 JD_PATH = Path("data/jd.txt")
 
+SCORER_THREADS = 4  # concurrent OpenAI scoring calls on the sequential path
+
 _ID_RE = re.compile(r"/nyanya/[^/]+/(?P<id>\d+)(?:/|$)")
+_DIGITS_RE = re.compile(r"\d+")
 
 def fetch_phones_for_sheet_rows(page, sheet_ctx: dict, targets: list[dict], *, pause_ms: int = 400) -> int:
     """
@@ -79,9 +82,8 @@ def fetch_phones_for_sheet_rows(page, sheet_ctx: dict, targets: list[dict], *, p
                 print(f"[PHONES] navigation failed for row {row_idx}: {e}", flush=True)
                 continue
 
-        page.wait_for_timeout(250)
-
         try:
+            # waits for the 'Телефон' button itself; no fixed settle delay needed
             phone_e164 = extract_phone_number(page) or ""
         except Exception as e:
             print(f"[PHONES] extract failed row {row_idx}: {e}", flush=True)
@@ -117,12 +119,7 @@ def textify(x: Any) -> str:
     if x is None:
         return ""
     if isinstance(x, (list, tuple)):
-        parts: list[str] = []
-        for v in x:
-            if v is None:
-                continue
-            parts.append(str(v).strip())
-        return " ".join(p for p in parts if p)
+        return " ".join(p for p in (str(v).strip() for v in x if v is not None) if p)
     # numbers, booleans, playwright JSHandles coerced to str
     return str(x).strip()
 
@@ -130,11 +127,13 @@ def intify(x: Any) -> Optional[int]:
     """Best-effort int; works if extractors return '56 лет', '30', ('30', 'лет'), etc."""
     if x is None:
         return None
+    if isinstance(x, int) and not isinstance(x, bool):
+        return x
     if isinstance(x, (list, tuple)):
         x = x[0] if x else None
-    if x is None:
-        return None
-    m = re.search(r"\d+", str(x))
+        if x is None:
+            return None
+    m = _DIGITS_RE.search(x if isinstance(x, str) else str(x))
     return int(m.group(0)) if m else None
 
 
@@ -153,16 +152,31 @@ def scrape_open_profile(
     Assumes we are already on a profile page after clicking from SERP.
     Scrapes fields, scores via OpenAI, returns a row for CSV.
     """
-    name_raw        = extract_name_from_profile(page)
-    age_raw         = extract_age_from_profile(page)
-    experience_raw  = extract_experience_from_profile(page)
-    about_raw       = extract_about_from_profile(page)
-    education_raw   = extract_education_from_profile(page)
-    recs_raw        = extract_recommendations_from_profile(page)
-    location_raw    = extract_location_from_profile(page)
+    row = extract_open_profile(page, home_address=home_address, no_phones=no_phones)
+    return score_row(row, jd_text, no_openai=no_openai)
+
+def extract_open_profile(
+    page,
+    *,
+    home_address: str = "",
+    no_phones: bool = False,
+) -> dict:
+    """
+    DOM part of scrape_open_profile: the row without score / explanation_bullets /
+    is_male (see score_row). Touches only the page, so the (slow, network-bound)
+    scoring can run in another thread while the page moves on.
+    """
+    fields          = extract_all_fields(ProfileContext(page))  # one DOM read (+ one page.content() if needed)
+    name_raw        = fields["name"]
+    age_raw         = fields["age"]
+    experience_raw  = fields["experience"]
+    about_raw       = fields["about"]
+    education_raw   = fields["education"]
+    recs_raw        = fields["recommendations"]
+    location_raw    = fields["location"]
     travel_time     = extract_travel_time_via_yandex(page, home_address=home_address)
-    has_audio       = extract_has_audio_from_profile(page)
-    has_fairy_tale_audio = extract_has_fairy_tale_audio(page)
+    has_audio       = fields["has_audio"]
+    has_fairy_tale_audio = fields["has_fairy_tale_audio"]
     if no_phones:
         phone_e164 = None
         if os.getenv("PHONES_DEBUG") == "1":
@@ -189,21 +203,50 @@ def scrape_open_profile(
     experience  = intify(experience_raw)
     location    = textify(location_raw)
 
-    payload = {
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
         "profile_id": profile_id,
-        "url": canon_url(url_now),
+        "url": url_now,
+        "profile_url": canon_url(url_now),
         "name": name,
         "age": age,
-        "experience": experience,
+        "experience_years": experience,
         "about": about,
         "education": education,
         "recommendations": recs,
-        "location": location, # nanny address
-        "travel_time": travel_time, # via yandex maps
+        "location": location,
+        "travel_time_min": travel_time,
+        "phone": phone_e164,
         "has_audio": has_audio,
         "has_fairy_tale_audio": has_fairy_tale_audio,
     }
 
+def _row_or_none(fut, url: str) -> Optional[dict]:
+    """Result of a score_row future; None (reported as a failed scrape) if scoring raised."""
+    try:
+        return fut.result()
+    except Exception as e:
+        print(f"[WARN] scoring failed: {e!r} -> {url}", flush=True)
+        return None
+
+
+def score_row(row: dict, jd_text: str, *, no_openai: bool = False) -> dict:
+    """Score an extract_open_profile row via OpenAI (no page access); fills it in and returns it."""
+    payload = {
+        "profile_id": row["profile_id"],
+        "url": row["profile_url"],
+        "name": row["name"],
+        "age": row["age"],
+        "experience": row["experience_years"],
+        "about": row["about"],
+        "education": row["education"],
+        "recommendations": row["recommendations"],
+        "location": row["location"], # nanny address
+        "travel_time": row["travel_time_min"], # via yandex maps
+        "has_audio": row["has_audio"],
+        "has_fairy_tale_audio": row["has_fairy_tale_audio"],
+    }
+
     if no_openai:
         score, reasons, is_male = 0, ["skipped (no-openai)"], False
     else:
@@ -212,28 +255,31 @@ def scrape_open_profile(
             payload,
         )
         if os.getenv("SCORER_DEBUG") == "1":
-            print(f"[SCORER] score={score} travel_time_min={travel_time} for {url_now}", flush=True)  # one-line debug
+            print(f"[SCORER] score={score} travel_time_min={row['travel_time_min']} for {row['url']}", flush=True)  # one-line debug
 
-    return {
-        "timestamp": datetime.now().isoformat(timespec="seconds"),
-        "profile_id": profile_id,
-        "url": url_now,
-        "profile_url": canon_url(url_now),
-        "name": name,
-        "age": age,
-        "experience_years": experience,
-        "about": about,
-        "education": education,
-        "recommendations": recs,
-        "score": score,
-        "explanation_bullets": "\n".join(reasons) if reasons else "",
-        "location": location,
-        "travel_time_min": travel_time,
-        "is_male": is_male,
-        "phone": phone_e164,
-        "has_audio": has_audio,
-        "has_fairy_tale_audio": has_fairy_tale_audio,
-    }
+    row["score"] = score
+    row["explanation_bullets"] = "\n".join(reasons) if reasons else ""
+    row["is_male"] = is_male
+    return row
+
+def polite_pause(page, delay_ms: int) -> None:
+    """Optional jittered delay between navigations (--polite-delay-ms; 0 = none)."""
+    if delay_ms > 0:
+        page.wait_for_timeout(delay_ms * random.uniform(0.75, 1.25))
+
+def return_to_serp(page, serp_url: str, steps: int) -> None:
+    """
+    Go back `steps` history entries in one navigation (keeps the SERP's
+    pagination state); fall back to reloading `serp_url`.
+    """
+    try:
+        with page.expect_navigation(wait_until="domcontentloaded", timeout=15000):
+            page.evaluate("n => history.go(-n)", steps)
+        if page.url == serp_url:
+            return
+    except Exception:
+        pass
+    page.goto(serp_url, wait_until="domcontentloaded")
 
 def scrape_recent_on_current_serp(
     page,
@@ -246,11 +292,16 @@ def scrape_recent_on_current_serp(
     no_openai: bool = False,
     home_address: str = "",
     no_phones: bool = False,       
+    workers: int = 1,
+    batch_pool: Optional[ProfileBatchPool] = None,
+    polite_delay_ms: int = 0,
 ) -> int:
     """
     Single-SERP-page workflow:
       1) COLLECT on the SERP: read last-active; keep only ≤ cutoff_hours
       2) OPEN only those candidates not in `seen_ids`
+         (with workers > 1, profiles are scraped in parallel side browsers,
+         on `batch_pool` if given so they survive across pages)
     Returns number of rows written.
     """
     cutoff_dt = datetime.now().astimezone() - timedelta(hours=cutoff_hours)
@@ -259,15 +310,16 @@ def scrape_recent_on_current_serp(
     sink = sink if sink is not None else []
 
     # ---- 1) COLLECT (no navigation) -----------------------------------------
-    cards = get_serp_cards(page)
-    total = cards.count()
+    get_serp_cards(page)  # wait for the SERP to render
+    serp_rows = extract_serp_rows(page)
+    total = len(serp_rows)
     print(f"[INFO] SERP shows {total} nanny cards.")
 
     candidates: List[Dict] = []
-    for i in range(total):
-        card = cards.nth(i)
-        raw, last_dt = extract_last_active_from_card(card)
-        url = card_primary_url(card)
+    queued: set = set()  # a profile can be listed twice on a page (e.g. promoted)
+    for i, sr in enumerate(serp_rows):
+        raw, last_dt = sr["last_active_raw"], sr["last_active_at"]
+        url = sr["url"]
         pid = profile_id_from_url(url) if url else None
 
         is_recent = bool(last_dt and last_dt >= cutoff_dt)
@@ -291,6 +343,9 @@ def scrape_recent_on_current_serp(
             print(f"[SKIP-open] known in sheet; queued last_active update: {url}", flush=True)
             written += 1            # <-- so pagination won't early-stop on this page
             continue
+        if pid_c in queued:
+            continue
+        queued.add(pid_c)
 
         candidates.append({
             "index": i,
@@ -305,28 +360,63 @@ def scrape_recent_on_current_serp(
     print(f"[INFO] candidates ≤{cutoff_hours}h on this page: {len(candidates)}", flush=True)
 
     # ---- 2) OPEN candidates (navigate, scrape, write) -----------------------
-    for j, c in enumerate(candidates, 1):
-        page.goto(c["url"], wait_until="domcontentloaded")
-
-        row = scrape_open_profile(
-            page, 
-            jd_text, 
-            no_openai=no_openai, 
+    batch_rows = None
+    if workers > 1 and candidates:
+        # browser workers only do DOM work; OpenAI scoring stays out of them
+        extract = functools.partial(
+            extract_open_profile,
             home_address=home_address,
             no_phones=no_phones,
         )
+        urls = [c["url"] for c in candidates]
+        if batch_pool is not None:
+            extracted = batch_pool.run(urls, extract)
+        else:
+            extracted = extract_profiles_batch(
+                urls,
+                extract,
+                storage_state=str(STORAGE_STATE_PATH),
+                max_concurrency=workers,
+            )
+        with ThreadPoolExecutor(max_workers=SCORER_THREADS) as scorer:
+            futures = [
+                scorer.submit(score_row, fields, jd_text, no_openai=no_openai) if fields is not None else None
+                for fields in extracted
+            ]
+        batch_rows = [
+            _row_or_none(f, c["url"]) if f is not None else None
+            for f, c in zip(futures, candidates)
+        ]
+
+    # Profiles are opened by URL; the SERP is only needed again for pagination
+    serp_url = page.url
+    navigated = 0
+
+    # Sequential path: the page only does DOM work; each profile's OpenAI
+    # scoring runs in a thread while the next profile loads
+    rows: list = batch_rows if batch_rows is not None else []
+    if batch_rows is None and candidates:
+        with ThreadPoolExecutor(max_workers=SCORER_THREADS) as scorer:
+            for c in candidates:
+                if navigated:
+                    polite_pause(page, polite_delay_ms)
+                page.goto(c["url"], wait_until="domcontentloaded")
+                navigated += 1
+                fields = extract_open_profile(page, home_address=home_address, no_phones=no_phones)
+                rows.append(scorer.submit(score_row, fields, jd_text, no_openai=no_openai))
+        rows = [_row_or_none(f, c["url"]) for f, c in zip(rows, candidates)]
+
+    for j, c in enumerate(candidates, 1):
+        row = rows[j - 1]
+        if row is None:
+            print(f"[WARN] [{j}/{len(candidates)}] scrape failed -> {c['url']}", flush=True)
+            continue
 
         # Skip male nannies flagged by the model
         if row.get("is_male"):
             print(f"[SKIP-open] male (model): {row.get('name')!r} -> {c['url']}", flush=True)
             if c.get("pid"):
                 seen_ids.add(c["pid"])
-            # Back to SERP for the next candidate
-            try:
-                page.go_back(wait_until="domcontentloaded")
-            except Exception:
-                page.goto(SERP_URL, wait_until="domcontentloaded")
-            page.wait_for_timeout(300)
             continue
 
         # audit fields from the SERP card
@@ -350,12 +440,9 @@ def scrape_recent_on_current_serp(
         written += 1
         print(f"[OK] [{j}/{len(candidates)}] saved {row.get('name')!r} -> {row.get('url')}", flush=True)
 
-        # Back to SERP for the next candidate
-        try:
-            page.go_back(wait_until="domcontentloaded")
-        except Exception:
-            page.goto(SERP_URL, wait_until="domcontentloaded")
-        page.wait_for_timeout(300)
+    # Back to this SERP page once, for pagination (not after every profile)
+    if navigated:
+        return_to_serp(page, serp_url, navigated)
 
     return written
 
@@ -374,6 +461,9 @@ def scrape_recent_across_pages(
     sheet_id: str = "",
     new_only: bool = False,
     sheet_ctx: Optional[dict] = None,
+    workers: int = 1,
+    batch_pool: Optional[ProfileBatchPool] = None,
+    polite_delay_ms: int = 0,
 ) -> int:
     total_written = 0
     page_index = 1
@@ -394,6 +484,9 @@ def scrape_recent_across_pages(
             no_openai=no_openai,
             home_address=home_address,  
             no_phones=no_phones,
+            workers=workers,
+            batch_pool=batch_pool,
+            polite_delay_ms=polite_delay_ms,
         )
 
         # Per-page flush to Google Sheets
@@ -405,6 +498,7 @@ def scrape_recent_across_pages(
                     scraped_rows=rows_page,
                     new_only=new_only,
                     ctx=sheet_ctx,   # <— reuse, no re-reads
+                    final=False,     # sorted once after the last page
                 )
             except Exception as e:
                 print(f"[SHEETS][Page {page_index}] upsert failed: {e}", flush=True)
@@ -429,9 +523,17 @@ def scrape_recent_across_pages(
             print("[INFO] No (enabled) Next or page didn't change. Done.", flush=True)
             break
 
-        page.wait_for_timeout(350)
+        # go_to_next_serp_page already waited for the new cards
+        polite_pause(page, polite_delay_ms)
         page_index += 1
 
+    # One score sort for the whole run (per-page upserts deferred it)
+    if sa_json and sheet_id:
+        try:
+            flush_pending_sort(sheet_ctx or get_or_init_ctx(sa_json, sheet_id))
+        except Exception as e:
+            print(f"[SHEETS] final sort failed: {e}", flush=True)
+
     return total_written, total_new, total_upd
 
 
@@ -469,11 +571,32 @@ def main():
         action="store_true",
         help="If set, fetch phone even if phone cell is already filled (default: only rows where phone is empty).",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("SCRAPE_WORKERS", "1")),
+        help="Scrape up to N profiles in parallel in side browsers "
+             "(default 1 = sequential in the main window, or $SCRAPE_WORKERS). "
+             "Opt-in: the site bans aggressive crawls.",
+    )
     parser.add_argument(
         "--headless",
         action="store_true",
-        help="If set, run chromium headless",
+        help="Run chromium headless (the default unless HEADLESS=0)",
+    )
+    parser.add_argument(
+        "--headed",
+        dest="headless",
+        action="store_false",
+        help="Show the browser window (debugging)",
     )
+    parser.add_argument(
+        "--polite-delay-ms",
+        type=int,
+        default=0,
+        help="Jittered pause between profile/page navigations, if the site needs rate limiting (default 0).",
+    )
+    parser.set_defaults(headless=os.getenv("HEADLESS", "1") != "0")
     args = parser.parse_args()
 
     if not STORAGE_STATE_PATH.exists():
@@ -488,7 +611,8 @@ def main():
 
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=bool(args.headless))
-        context = browser.new_context(storage_state=str(STORAGE_STATE_PATH))
+        # skips images/fonts/media/trackers and installs the overlay dismisser
+        context = new_light_context(browser, storage_state=str(STORAGE_STATE_PATH))
         page = context.new_page()
 
         # === PHONE-ONLY MODE ===========================================================
@@ -511,6 +635,8 @@ def main():
                     "duration_sec": round(time.time() - t0, 1),
                 }
                 append_run_row(args.sa_json, args.sheet_id, run_info)
+                # write it now; the atexit flush is only a backstop
+                flush_run_rows(args.sa_json, args.sheet_id)
             except Exception as e:
                 print(f"[WARN] could not append Runs row (phones-only): {e}")
 
@@ -525,21 +651,37 @@ def main():
 
         print(f"[SHEETS] known profiles in sheet: {len(known_ids)}")
 
-        total_written, new_count, upd_count = scrape_recent_across_pages(
-            page,
-            jd_text,
-            cutoff_hours=args.since_hours,
-            cap_per_page=args.cap_per_page,
-            max_pages=args.max_pages,
-            seen_ids=known_ids,
-            no_openai=args.no_openai, 
-            home_address=args.home_address,
-            no_phones=args.no_phones,
-            sa_json=args.sa_json,
-            sheet_id=args.sheet_id,
-            new_only=args.new_only,
-            sheet_ctx=sheet_ctx,
+        # Parallel workers (opt-in): started once for the whole run, not once per SERP page
+        batch_pool = (
+            ProfileBatchPool(
+                storage_state=str(STORAGE_STATE_PATH),
+                headless=bool(args.headless),
+                max_concurrency=args.workers,
+            )
+            if args.workers > 1 else None
         )
+        try:
+            total_written, new_count, upd_count = scrape_recent_across_pages(
+                page,
+                jd_text,
+                cutoff_hours=args.since_hours,
+                cap_per_page=args.cap_per_page,
+                max_pages=args.max_pages,
+                seen_ids=known_ids,
+                no_openai=args.no_openai, 
+                home_address=args.home_address,
+                no_phones=args.no_phones,
+                sa_json=args.sa_json,
+                sheet_id=args.sheet_id,
+                new_only=args.new_only,
+                sheet_ctx=sheet_ctx,
+                workers=args.workers,
+                batch_pool=batch_pool,
+                polite_delay_ms=args.polite_delay_ms,
+            )
+        finally:
+            if batch_pool is not None:
+                batch_pool.close()
         pages_scanned = "N/A" if args.max_pages is None else args.max_pages  # set a real count if you tracked it
 
         print(f"[SHEETS] totals across pages -> inserted={new_count} updated={upd_count}")
@@ -557,6 +699,8 @@ def main():
         }
         try:
             append_run_row(args.sa_json, args.sheet_id, run_info)
+            # write it now; the atexit flush is only a backstop
+            flush_run_rows(args.sa_json, args.sheet_id)
         except Exception as e:
             print(f"[WARN] could not append Runs row: {e}")
 
@@ -1,5 +1,6 @@
 # scorer.py
 import os, re, sys, json, httpx
+import functools
 from openai import OpenAI
 from typing import List, Tuple, Optional
 
@@ -83,19 +84,22 @@ def _apply_penalties_with_details(
         score = min(score, 3)
     return score, adjustments
 
+_JSON_BLOCK_RE = re.compile(r"\{.*\}", re.S)
+
 def _safe_json_load(s: str) -> dict:
     """Parse JSON; if model wrapped it with text, grab the first {...} block."""
-    import re, json
     try:
         return json.loads(s)
     except Exception:
-        m = re.search(r"\{.*\}", s, flags=re.S)
+        m = _JSON_BLOCK_RE.search(s)
         if m:
             return json.loads(m.group(0))
         raise
 
 
+@functools.lru_cache(maxsize=1)
 def make_openai_client() -> OpenAI:
+    """One client (and one pooled httpx connection) per process; it is thread-safe."""
     proxy = os.getenv("OPENAI_PROXY")  # e.g. socks5://127.0.0.1:1080  OR socks5h://…
     if not proxy:
         return OpenAI()
@@ -119,6 +123,55 @@ def make_openai_client() -> OpenAI:
 from typing import Optional
 import os, sys, re, json
 
+_SYSTEM_MSG = (
+    "Ты — строгий, прагматичный оценщик соответствия профиля вакансии. "
+    "Не раскрывай ход размышлений, верни только JSON."
+)
+
+_INSTRUCTIONS = (
+    "Верни СТРОГО ЧИСТЫЙ JSON (без пояснений и текста вне JSON).\n\n"
+    "ЗАДАЧА: оценить профиль няни для конкретной семьи по двум осям и отдельно оценить аутентичность текста «О себе».\n\n"
+    "ЖЁСТКИЕ ПРАВИЛА И СКЕПСИС:\n"
+    "- Не додумывай факты: если чего-то нет в данных — укажи в missing_info.\n"
+    "- Источники маркируй так: [факт] — из структурированных фактов профиля; [о себе] — из текста «О себе»; [рек.] — из рекомендаций.\n"
+    "- Цитируй коротко (2–6 слов) и только по делу. Цитаты из рекомендаций помечай как [рек.]: «…».\n"
+    "- Иерархия доказательств (важность по убыванию): 1) подтверждённые дела/тенюры/повторные семьи/сертификаты ([факт]/[рек.]); 2) поведенческая конкретика в «О себе» (действия, рутины, решения); 3) голые прилагательные и общие фразы.\n"
+    "- КЛИШЕ («люблю детей», «ответственная», «нахожу общий язык со всеми») считаются НУЛЕВЫМ доказательством, если не поддержаны конкретикой (когда/с кем/что делала/какой результат).\n"
+    "- Противоречия и несостыковки (сроки, график, возраст детей vs опыт) снижают оценки и отражаются в reasons_*.\n\n"
+    "МЕТРИКИ И КРИТЕРИИ:\n"
+    "- Operational fit (0–10): используй И ФАКТЫ профиля, И «О себе». Оцени: (1) возрастные группы/опыт; (2) совпадение по графику; (3) задачи/навыки; (4) безопасность/компетентность (первая помощь, рутины, план Б); (5) язык/коммуникация с семьёй. Подкрепляй каждый балл доказательствами из [факт]/[о себе]/[рек.].\n"
+    "- Human fit (0–10): строго доказательно. Для каждого аспекта смотри на ДЕЙСТВИЯ/РЕЗУЛЬТАТЫ:\n"
+    "  • Ответственность/надёжность — длинные тенюры, повторные семьи, «не опаздываю/предупреждаю заранее», веду дневник, план Б, CPR/первая помощь.\n"
+    "  • Доброжелательность/child-centered — следую интересам ребёнка, мягкая адаптация, co-regulation/positive reinforcement, возрастно-адекватные активности.\n"
+    "  • Любовь к детям — конкретные наблюдения/радости ребёнка, small extra без героики, инициативы ребёнка.\n"
+    "  • Тёплая коммуникация — регулярные апдейты, ясные границы (напр. без гаджетов), согласование ожиданий с родителями.\n"
+    "  Если по аспекту есть только прилагательные без примеров — считай это нулевым доказательством. Если по всей оси только общие слова — ограничь Human fit не выше 4.0/10.\n"
+    "- Authenticity (0.00–1.00): оцени ТОЛЬКО «О себе» по: конкретике (возраст/примеры/рутины), первому лицу и опыту, балансу (границы/ограничения), внутренней согласованности, низкой клишированности. Несостыковки и штампы снижают балл.\n"
+    "- Combined fit: вычисли как 0.6*Operational + 0.4*(Human * (0.7 + 0.3*Authenticity)).\n\n"
+    "- Пол/гендер: верни is_male=true, если из данных следует мужчина (напр. «Пол: мужской», мужские формы/имя, «няня-мужчина»). Иначе false.\n\n"
+    "ОБЯЗАТЕЛЬНО ПРО «НЕ 10/10»:\n"
+    "- Если operational_fit < 10.0 — в конце массива reasons_operational добавь один буллет, начинающийся строго так: «не 10/10: …», где перечисли 1–3 главные причины/отсутствующие ДОКАЗАТЕЛЬСТВА (а не просто поля) мешающие 10/10. Примеры причин: нет подтверждённого опыта в нужной возрастной группе; график не совпадает; нет сигналов по безопасности (CPR/рутины/план Б); только прилагательные без примеров; противоречия. \n"
+    "- Если human_fit < 10.0 — в конце массива reasons_human добавь один буллет, начинающийся «не 10/10: …», с 1–3 главными пробелами в ПОВЕДЕНЧЕСКИХ доказательствах (нет длинных тенюр/повторных семей, мало конкретики про co-regulation/границы, только общие слова и т.п.).\n"
+    "- Если оценка равна 10.0 — такой буллет не добавляй.\n\n"
+    "Формат ответа — строго этот JSON:\n"
+    "{\n"
+    '  \"operational_fit\": <число 0..10 с 1 знаком после запятой>,\n'
+    '  \"human_fit\": <число 0..10 с 1 знаком после запятой>,\n'
+    '  \"authenticity\": <число 0..1 с 2 знаками после запятой>,\n'
+    '  \"combined_fit\": <число 0..10 с 1 знаком после запятой>,\n'
+    '  \"is_male\": <true|false>,\n'
+    '  \"reasons_operational\": [\"<=5 коротких буллетов, каждый начинается с [факт]/[о себе]/[рек.] и содержит цитату; последний — при необходимости — ‘не 10/10: …’\"],\n'
+    '  \"reasons_human\": [\"<=5 буллетов — только доказанные маркеры поведения; последний — при необходимости — ‘не 10/10: …’\"],\n'
+    '  \"reasons_authenticity\": [\"2–4 буллета про конкретику/клише/баланс/согласованность с «цитатами»\"],\n'
+    '  \"missing_info\": [\"чего не хватает (график, задачи, безопасность, рекомендации, возраст детей и т.д.)\"]\n'
+    "}\n\n"
+)
+
+@functools.lru_cache(maxsize=4)
+def _jd_prompt_prefix(jd_text: str) -> str:
+    """Instructions + JD block: identical for every profile scored against one JD."""
+    return _INSTRUCTIONS + f"Описание вакансии (JD):\n{jd_text}\n\n"
+
 def score_with_chatgpt(jd_text: str, profile: dict) -> tuple[int, list[str], bool]:
     """
     Return (score 1..10, reasons [3-5 bullets], travel_time minutes or None).
@@ -133,52 +186,11 @@ def score_with_chatgpt(jd_text: str, profile: dict) -> tuple[int, list[str], boo
     recs_text = "\n".join(f"- {r.strip()}" for r in recs[:5]) or "—"
 
 
-    system_msg = (
-        "Ты — строгий, прагматичный оценщик соответствия профиля вакансии. "
-        "Не раскрывай ход размышлений, верни только JSON."
-    )
-
     user_msg = (
-        "Верни СТРОГО ЧИСТЫЙ JSON (без пояснений и текста вне JSON).\n\n"
-        "ЗАДАЧА: оценить профиль няни для конкретной семьи по двум осям и отдельно оценить аутентичность текста «О себе».\n\n"
-        "ЖЁСТКИЕ ПРАВИЛА И СКЕПСИС:\n"
-        "- Не додумывай факты: если чего-то нет в данных — укажи в missing_info.\n"
-        "- Источники маркируй так: [факт] — из структурированных фактов профиля; [о себе] — из текста «О себе»; [рек.] — из рекомендаций.\n"
-        "- Цитируй коротко (2–6 слов) и только по делу. Цитаты из рекомендаций помечай как [рек.]: «…».\n"
-        "- Иерархия доказательств (важность по убыванию): 1) подтверждённые дела/тенюры/повторные семьи/сертификаты ([факт]/[рек.]); 2) поведенческая конкретика в «О себе» (действия, рутины, решения); 3) голые прилагательные и общие фразы.\n"
-        "- КЛИШЕ («люблю детей», «ответственная», «нахожу общий язык со всеми») считаются НУЛЕВЫМ доказательством, если не поддержаны конкретикой (когда/с кем/что делала/какой результат).\n"
-        "- Противоречия и несостыковки (сроки, график, возраст детей vs опыт) снижают оценки и отражаются в reasons_*.\n\n"
-        "МЕТРИКИ И КРИТЕРИИ:\n"
-        "- Operational fit (0–10): используй И ФАКТЫ профиля, И «О себе». Оцени: (1) возрастные группы/опыт; (2) совпадение по графику; (3) задачи/навыки; (4) безопасность/компетентность (первая помощь, рутины, план Б); (5) язык/коммуникация с семьёй. Подкрепляй каждый балл доказательствами из [факт]/[о себе]/[рек.].\n"
-        "- Human fit (0–10): строго доказательно. Для каждого аспекта смотри на ДЕЙСТВИЯ/РЕЗУЛЬТАТЫ:\n"
-        "  • Ответственность/надёжность — длинные тенюры, повторные семьи, «не опаздываю/предупреждаю заранее», веду дневник, план Б, CPR/первая помощь.\n"
-        "  • Доброжелательность/child-centered — следую интересам ребёнка, мягкая адаптация, co-regulation/positive reinforcement, возрастно-адекватные активности.\n"
-        "  • Любовь к детям — конкретные наблюдения/радости ребёнка, small extra без героики, инициативы ребёнка.\n"
-        "  • Тёплая коммуникация — регулярные апдейты, ясные границы (напр. без гаджетов), согласование ожиданий с родителями.\n"
-        "  Если по аспекту есть только прилагательные без примеров — считай это нулевым доказательством. Если по всей оси только общие слова — ограничь Human fit не выше 4.0/10.\n"
-        "- Authenticity (0.00–1.00): оцени ТОЛЬКО «О себе» по: конкретике (возраст/примеры/рутины), первому лицу и опыту, балансу (границы/ограничения), внутренней согласованности, низкой клишированности. Несостыковки и штампы снижают балл.\n"
-        "- Combined fit: вычисли как 0.6*Operational + 0.4*(Human * (0.7 + 0.3*Authenticity)).\n\n"
-        "- Пол/гендер: верни is_male=true, если из данных следует мужчина (напр. «Пол: мужской», мужские формы/имя, «няня-мужчина»). Иначе false.\n\n"
-        "ОБЯЗАТЕЛЬНО ПРО «НЕ 10/10»:\n"
-        "- Если operational_fit < 10.0 — в конце массива reasons_operational добавь один буллет, начинающийся строго так: «не 10/10: …», где перечисли 1–3 главные причины/отсутствующие ДОКАЗАТЕЛЬСТВА (а не просто поля) мешающие 10/10. Примеры причин: нет подтверждённого опыта в нужной возрастной группе; график не совпадает; нет сигналов по безопасности (CPR/рутины/план Б); только прилагательные без примеров; противоречия. \n"
-        "- Если human_fit < 10.0 — в конце массива reasons_human добавь один буллет, начинающийся «не 10/10: …», с 1–3 главными пробелами в ПОВЕДЕНЧЕСКИХ доказательствах (нет длинных тенюр/повторных семей, мало конкретики про co-regulation/границы, только общие слова и т.п.).\n"
-        "- Если оценка равна 10.0 — такой буллет не добавляй.\n\n"
-        "Формат ответа — строго этот JSON:\n"
-        "{\n"
-        '  \"operational_fit\": <число 0..10 с 1 знаком после запятой>,\n'
-        '  \"human_fit\": <число 0..10 с 1 знаком после запятой>,\n'
-        '  \"authenticity\": <число 0..1 с 2 знаками после запятой>,\n'
-        '  \"combined_fit\": <число 0..10 с 1 знаком после запятой>,\n'
-        '  \"is_male\": <true|false>,\n'
-        '  \"reasons_operational\": [\"<=5 коротких буллетов, каждый начинается с [факт]/[о себе]/[рек.] и содержит цитату; последний — при необходимости — ‘не 10/10: …’\"],\n'
-        '  \"reasons_human\": [\"<=5 буллетов — только доказанные маркеры поведения; последний — при необходимости — ‘не 10/10: …’\"],\n'
-        '  \"reasons_authenticity\": [\"2–4 буллета про конкретику/клише/баланс/согласованность с «цитатами»\"],\n'
-        '  \"missing_info\": [\"чего не хватает (график, задачи, безопасность, рекомендации, возраст детей и т.д.)\"]\n'
-        "}\n\n"
-        f"Описание вакансии (JD):\n{jd_text}\n\n"
-        f"Текст «О себе» няни:\n{about_text}\n\n"
-        f"Факты профиля (JSON):\n{profile_summary}\n\n"
-        f"Рекомендации (текст, если есть):\n{recs_text}\n"
+        _jd_prompt_prefix(jd_text)
+        + f"Текст «О себе» няни:\n{about_text}\n\n"
+        + f"Факты профиля (JSON):\n{profile_summary}\n\n"
+        + f"Рекомендации (текст, если есть):\n{recs_text}\n"
     )
 
     try:
@@ -188,7 +200,7 @@ def score_with_chatgpt(jd_text: str, profile: dict) -> tuple[int, list[str], boo
             temperature=0.1,
             response_format={"type": "json_object"},
             messages=[
-                {"role": "system", "content": system_msg},
+                {"role": "system", "content": _SYSTEM_MSG},
                 {"role": "user", "content": user_msg},
             ],
         )